@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from src.services.calendar_service import CalendarService
+
+_EVENTS_PAYLOAD = json.dumps(
+    {
+        "kind": "calendar#events",
+        "items": [
+            {
+                "id": f"evt{index}",
+                "summary": f"Meeting {index}",
+                "start": {"dateTime": "2026-01-01T10:00:00+09:00"},
+                "end": {"dateTime": "2026-01-01T11:00:00+09:00"},
+            }
+            for index in range(5)
+        ],
+    }
+).encode("utf-8")
+
+
+class _StubCalendarHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # ヘッダーと本文が別々に書かれるため、Nagle と遅延ACKで keep-alive 接続だけ約40ms待たされるのを防ぐ。
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_EVENTS_PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(_EVENTS_PAYLOAD)
+
+    def log_message(self, format: str, *args) -> None:
+        return
+
+
+class _LegacyCalendarService(CalendarService):
+    # 変更前と同じく、呼び出しごとに token.json を読み直してクライアントを組み立てる。
+    def _build_service(self):
+        credentials = Credentials.from_authorized_user_file(str(self.token_file), self.SCOPES)
+        client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+        return build("calendar", "v3", credentials=credentials, cache_discovery=False, client_options=client_options)
+
+
+def _write_token(path: Path) -> None:
+    expiry = (datetime.now(timezone.utc) + timedelta(hours=1)).replace(tzinfo=None)
+    path.write_text(
+        json.dumps(
+            {
+                "token": "stub-access-token",
+                "refresh_token": "stub-refresh-token",
+                "client_id": "stub-client-id",
+                "client_secret": "stub-client-secret",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "scopes": CalendarService.SCOPES,
+                "expiry": expiry.isoformat() + "Z",
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+def _run(label: str, service: CalendarService, calls: int, threads: int) -> None:
+    def call(_: int) -> None:
+        service.get_today_events(calendar_id="primary", timezone_name="Asia/Tokyo")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(calls)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {calls / elapsed:>10,.1f} calls/sec ({elapsed:.3f}s, threads={threads})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare cached vs per-call Calendar client construction.")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubCalendarHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        token_file = Path(tmp) / "token.json"
+        _write_token(token_file)
+        common = {
+            "client_secret_file": Path(tmp) / "credentials.json",
+            "token_file": token_file,
+            "api_endpoint": endpoint,
+            # 共有キャッシュを切り、クライアント組み立ての差だけを比べる。
+            "shared_cache_ttl_sec": 0,
+        }
+        _run("before", _LegacyCalendarService(**common), args.calls, args.threads)
+        _run("after", CalendarService(**common), args.calls, args.threads)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.db import Database
+
+
+def _legacy_get(db_path: Path, discord_user_id: str) -> sqlite3.Row | None:
+    # 旧実装と同じく呼び出しごとに接続を開いて閉じる。
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return conn.execute(
+            "SELECT * FROM user_settings WHERE discord_user_id = ?",
+            (discord_user_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def _run(label: str, func, user_ids: list[str], threads: int) -> None:
+    started = time.perf_counter()
+    if threads <= 1:
+        for user_id in user_ids:
+            func(user_id)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(func, user_ids))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {len(user_ids) / elapsed:>12,.0f} ops/sec ({elapsed:.3f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-call connect vs pooled Database reads.")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        # 設定キャッシュを切り、プール化した接続での読み出しそのものを測る。
+        db = Database(db_path, pool_size=args.threads, settings_cache_size=0)
+        db.init_db()
+        for index in range(args.users):
+            db.set_morning_on(str(index), morning_time="07:30", notify_channel_id="1")
+
+        user_ids = [str(index % args.users) for index in range(args.ops)]
+        for threads in sorted({1, args.threads}):
+            _run(f"per-call connect (t={threads})", lambda uid: _legacy_get(db_path, uid), user_ids, threads)
+            _run(f"pooled Database (t={threads})", db.get_user_settings, user_ids, threads)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
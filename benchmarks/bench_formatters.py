@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from src.db import UserSettings
+from src.services.daily_summary_service import DailySummaryResult
+from src.utils import formatters
+
+
+def _settings(index: int, location: int) -> UserSettings:
+    return UserSettings(
+        discord_user_id=str(100_000 + index),
+        calendar_id=None,
+        location_name=f"地点{location}",
+        latitude=35.0 + location * 0.01,
+        longitude=139.0 + location * 0.01,
+        timezone="Asia/Tokyo",
+        morning_enabled=1,
+        morning_time="07:30",
+        notify_channel_id="1",
+        created_at="",
+        updated_at="",
+    )
+
+
+def _events(seed: int, count: int) -> list[dict]:
+    rng = random.Random(seed)
+    events = []
+    for slot in range(count):
+        if rng.random() < 0.15:
+            events.append({"summary": f"終日イベント{seed}-{slot}", "all_day": True, "start": None, "end": None})
+            continue
+        hour = 8 + slot
+        events.append(
+            {
+                "summary": f"ミーティング{seed}-{slot}",
+                "all_day": False,
+                "start": f"{hour:02d}:00",
+                "end": f"{hour:02d}:30",
+            }
+        )
+    return events
+
+
+def _workload(
+    reports: int, locations: int, shared_calendars: int, private_ratio: float
+) -> list[tuple[UserSettings, DailySummaryResult]]:
+    # 地点・共有カレンダーは偏りを持たせて重複させ、一部のユーザーだけ個人カレンダーを持つ。
+    rng = random.Random(0)
+    weathers = [
+        {
+            "weather_text": rng.choice(["晴れ", "くもり", "雨", "雪"]),
+            "current_temperature": round(rng.uniform(-5, 35), 1),
+            "temperature_max": round(rng.uniform(10, 38), 1),
+            "temperature_min": round(rng.uniform(-10, 20), 1),
+            "precipitation_probability_max": rng.choice([None, 0, 10, 30, 60, 90]),
+        }
+        for _ in range(locations)
+    ]
+    calendars = [_events(seed, rng.randint(0, 6)) for seed in range(shared_calendars)]
+
+    workload = []
+    for index in range(reports):
+        location = min(int(rng.paretovariate(1.2)) - 1, locations - 1)
+        if rng.random() < private_ratio:
+            events = _events(10_000 + index, rng.randint(1, 5))
+        else:
+            events = calendars[min(int(rng.paretovariate(1.2)) - 1, shared_calendars - 1)]
+        summary = DailySummaryResult(
+            calendar_status="ok",
+            weather_status="ok",
+            events=events,
+            weather=weathers[location],
+        )
+        workload.append((_settings(index, location), summary))
+    return workload
+
+
+def _clear_section_cache() -> None:
+    formatters._render_weather_section.cache_clear()
+    formatters._render_calendar_section.cache_clear()
+
+
+def _run(
+    label: str, workload: list[tuple[UserSettings, DailySummaryResult]], rounds: int, reset=None
+) -> list[str]:
+    best = float("inf")
+    rendered: list[str] = []
+    for _ in range(rounds):
+        if reset is not None:
+            reset()
+        started = time.perf_counter()
+        rendered = [
+            formatters.format_daily_report(settings, summary, morning_mode=True, mention_user=True)
+            for settings, summary in workload
+        ]
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<20} {len(workload) / best:>12,.0f} reports/sec ({best * 1000:.1f}ms)")
+    return rendered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare cached vs uncached section rendering.")
+    parser.add_argument("--reports", type=int, default=10_000)
+    parser.add_argument("--locations", type=int, default=300)
+    parser.add_argument("--shared-calendars", type=int, default=50)
+    parser.add_argument("--private-ratio", type=float, default=0.2)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    workload = _workload(args.reports, args.locations, args.shared_calendars, args.private_ratio)
+
+    cached_weather = formatters._render_weather_section
+    cached_calendar = formatters._render_calendar_section
+    try:
+        # キャッシュを外した素の組み立て（変更前と同じ処理量）。
+        formatters._render_weather_section = cached_weather.__wrapped__
+        formatters._render_calendar_section = cached_calendar.__wrapped__
+        uncached = _run("uncached sections", workload, args.rounds)
+    finally:
+        formatters._render_weather_section = cached_weather
+        formatters._render_calendar_section = cached_calendar
+
+    # 送信1回分を想定し、毎ラウンド空のキャッシュから始める。
+    cached = _run("cached sections", workload, args.rounds, _clear_section_cache)
+    assert cached == uncached
+    print(formatters.section_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from src.services.weather_service import WeatherService
+from src.utils.http_client import HttpSessionPool
+
+_FORECAST_PAYLOAD = json.dumps(
+    {
+        "latitude": 35.68,
+        "longitude": 139.77,
+        "timezone": "Asia/Tokyo",
+        "current": {"temperature_2m": 12.3, "weather_code": 1},
+        "daily": {
+            "weather_code": [3],
+            "temperature_2m_max": [18.0],
+            "temperature_2m_min": [9.5],
+            "precipitation_probability_max": [20],
+        },
+    }
+).encode("utf-8")
+
+
+class _StubForecastHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # ヘッダと本文が別セグメントになるため、Nagle を切らないと keep-alive 側だけ遅延 ACK で待たされる。
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_FORECAST_PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(_FORECAST_PAYLOAD)
+
+    def log_message(self, format: str, *args) -> None:
+        return
+
+
+class _OneShotHttp:
+    # 変更前と同じく、呼び出しごとにモジュールレベルの requests.get で接続を張る。
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return requests.get(url, **kwargs)
+
+
+def _build(endpoint: str, http) -> WeatherService:
+    # キャッシュを切って毎回上流に出る経路だけを比べる。
+    service = WeatherService(http=http, cache_refresh_sec=0)
+    service.BASE_URL = endpoint
+    return service
+
+
+def _run(label: str, service: WeatherService, calls: int, threads: int) -> None:
+    latencies: list[float] = []
+
+    def call(_: int) -> None:
+        started = time.perf_counter()
+        service.get_today_weather(latitude=35.68, longitude=139.77, timezone_name="Asia/Tokyo")
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(calls)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(
+        f"{label:<8} {calls / elapsed:>9,.1f} calls/sec  "
+        f"p50={statistics.median(latencies) * 1000:.2f}ms  "
+        f"p99={latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000:.2f}ms  (threads={threads})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-call requests.get vs a pooled keep-alive session.")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubForecastHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1/forecast"
+
+    pool = HttpSessionPool(pool_size=args.threads)
+    for threads in sorted({1, args.threads}):
+        _run("before", _build(endpoint, _OneShotHttp()), args.calls, threads)
+        _run("after", _build(endpoint, pool), args.calls, threads)
+
+    pool.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
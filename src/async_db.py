@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, TypeVar
+
+from src.db import Database, OutboxMessage, UserSettings
+
+T = TypeVar("T")
+
+
+class AsyncDatabase:
+    # 書き込みは専用の1スレッドに直列化し、読み取りは小さなプールで行う。イベントループ上では SQLite に触れない。
+
+    def __init__(self, db: Database, *, read_workers: int = 3):
+        self.sync = db
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="morny-db-writer")
+        self._readers = ThreadPoolExecutor(
+            max_workers=max(1, read_workers),
+            thread_name_prefix="morny-db-reader",
+        )
+
+    async def get_user_settings(self, discord_user_id: str) -> UserSettings | None:
+        cached = self.sync.peek_user_settings(discord_user_id)
+        if cached is not None:
+            return cached
+        return await self._read(self.sync.get_user_settings, discord_user_id)
+
+    async def list_morning_enabled_users(self) -> list[UserSettings]:
+        return await self._read(self.sync.list_morning_enabled_users)
+
+    async def list_due_users(self, now_utc: datetime, window: timedelta) -> list[UserSettings]:
+        return await self._read(self.sync.list_due_users, now_utc, window)
+
+    async def advance_next_fire(self, discord_user_id: str, *, after: datetime) -> UserSettings | None:
+        return await self._write(self.sync.advance_next_fire, discord_user_id, after=after)
+
+    async def has_delivery(self, discord_user_id: str, local_date: str) -> bool:
+        return await self._read(self.sync.has_delivery, discord_user_id, local_date)
+
+    async def prune_deliveries(self, before_local_date: str) -> int:
+        return await self._write(self.sync.prune_deliveries, before_local_date)
+
+    async def enqueue_outbox(
+        self,
+        messages: list[tuple[str, str]],
+        *,
+        deliveries: Sequence[tuple[str, str]] = (),
+    ) -> int:
+        return await self._write(self.sync.enqueue_outbox, messages, deliveries=deliveries)
+
+    async def claim_outbox(self, now_utc: datetime, *, limit: int) -> list[OutboxMessage]:
+        return await self._write(self.sync.claim_outbox, now_utc, limit=limit)
+
+    async def release_outbox(self, message_ids: list[int]) -> None:
+        await self._write(self.sync.release_outbox, message_ids)
+
+    async def next_outbox_attempt(self) -> datetime | None:
+        return await self._read(self.sync.next_outbox_attempt)
+
+    async def set_outbox_status(
+        self,
+        message_id: int,
+        status: str,
+        *,
+        error: str | None = None,
+        next_attempt_at: datetime | None = None,
+    ) -> None:
+        await self._write(
+            self.sync.set_outbox_status,
+            message_id,
+            status,
+            error=error,
+            next_attempt_at=next_attempt_at,
+        )
+
+    async def prune_outbox(self, before_utc: datetime) -> int:
+        return await self._write(self.sync.prune_outbox, before_utc)
+
+    async def outbox_stats(self) -> dict[str, int]:
+        return await self._read(self.sync.outbox_stats)
+
+    async def get_cached_geocode(self, query_key: str) -> tuple[str | None, float | None, float | None] | None:
+        return await self._read(self.sync.get_cached_geocode, query_key)
+
+    async def put_cached_geocode(
+        self,
+        query_key: str,
+        *,
+        location_name: str | None,
+        latitude: float | None,
+        longitude: float | None,
+        ttl: timedelta,
+    ) -> None:
+        await self._write(
+            self.sync.put_cached_geocode,
+            query_key,
+            location_name=location_name,
+            latitude=latitude,
+            longitude=longitude,
+            ttl=ttl,
+        )
+
+    async def upsert_user_settings(self, discord_user_id: str, **fields: Any) -> UserSettings:
+        return await self._write(self.sync.upsert_user_settings, discord_user_id, **fields)
+
+    async def set_calendar_id(self, discord_user_id: str, calendar_id: str) -> UserSettings:
+        return await self._write(self.sync.set_calendar_id, discord_user_id, calendar_id)
+
+    async def set_location(
+        self,
+        discord_user_id: str,
+        *,
+        location_name: str,
+        latitude: float,
+        longitude: float,
+    ) -> UserSettings:
+        return await self._write(
+            self.sync.set_location,
+            discord_user_id,
+            location_name=location_name,
+            latitude=latitude,
+            longitude=longitude,
+        )
+
+    async def set_morning_on(
+        self,
+        discord_user_id: str,
+        *,
+        morning_time: str,
+        notify_channel_id: str,
+    ) -> UserSettings:
+        return await self._write(
+            self.sync.set_morning_on,
+            discord_user_id,
+            morning_time=morning_time,
+            notify_channel_id=notify_channel_id,
+        )
+
+    async def set_morning_off(self, discord_user_id: str) -> UserSettings:
+        return await self._write(self.sync.set_morning_off, discord_user_id)
+
+    # *_blocking はワーカースレッドから使う同期版。書き込みだけ単一ライターに載せて完了を待つ。
+    # イベントループ上からは呼ばないこと。
+    def apply_calendar_changes_blocking(self, calendar_id: str, **changes: Any) -> None:
+        self._write_blocking(self.sync.apply_calendar_changes, calendar_id, **changes)
+
+    def put_cached_geocode_blocking(self, query_key: str, **row: Any) -> None:
+        self._write_blocking(self.sync.put_cached_geocode, query_key, **row)
+
+    def settings_cache_stats(self) -> dict[str, int]:
+        return self.sync.settings_cache_stats()
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self.sync.close()
+
+    async def _read(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(func, *args, **kwargs))
+
+    def _write_blocking(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return self._writer.submit(functools.partial(func, *args, **kwargs)).result()
+
+    async def _write(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(func, *args, **kwargs))
@@ -10,12 +10,14 @@ from src.commands import register_all_commands
 
 if TYPE_CHECKING:
     from src.config import Config
-    from src.db import Database
+    from src.async_db import AsyncDatabase
+    from src.delivery import DeliveryDispatcher
     from src.scheduler import MorningScheduler
     from src.services.calendar_service import CalendarService
     from src.services.daily_summary_service import DailySummaryService
     from src.services.geocoding_service import GeocodingService
     from src.services.weather_service import WeatherService
+    from src.utils.http_client import AsyncHttpClient
 
 logger = logging.getLogger(__name__)
 
@@ -25,14 +27,20 @@ class MornyBot(commands.Bot):
         self,
         *,
         config: "Config",
-        db: "Database",
+        db: "AsyncDatabase",
         calendar_service: "CalendarService",
         weather_service: "WeatherService",
         geocoding_service: "GeocodingService",
         daily_summary_service: "DailySummaryService",
+        async_http: "AsyncHttpClient | None" = None,
     ):
         intents = discord.Intents.default()
-        super().__init__(command_prefix="!", intents=intents)
+        # 長いレート制限待ちは discord.py 内で眠らず RateLimited として返させ、配送側で再スケジュールする。
+        super().__init__(
+            command_prefix="!",
+            intents=intents,
+            max_ratelimit_timeout=config.delivery_max_ratelimit_wait_sec,
+        )
 
         self.config = config
         self.db = db
@@ -40,7 +48,9 @@ class MornyBot(commands.Bot):
         self.weather_service = weather_service
         self.geocoding_service = geocoding_service
         self.daily_summary_service = daily_summary_service
+        self.async_http = async_http
         self.morning_scheduler: "MorningScheduler | None" = None
+        self.delivery_dispatcher: "DeliveryDispatcher | None" = None
 
         register_all_commands(self)
 
@@ -54,8 +64,10 @@ class MornyBot(commands.Bot):
             synced = await self.tree.sync()
             logger.info("Synced %d global commands", len(synced))
 
+        if self.delivery_dispatcher:
+            self.delivery_dispatcher.start()
         if self.morning_scheduler:
-            self.morning_scheduler.start()
+            await self.morning_scheduler.start()
 
     async def on_ready(self) -> None:
         if self.user:
@@ -64,17 +76,22 @@ class MornyBot(commands.Bot):
     async def close(self) -> None:
         if self.morning_scheduler:
             self.morning_scheduler.shutdown()
+        if self.delivery_dispatcher:
+            await self.delivery_dispatcher.stop()
+        if self.async_http:
+            await self.async_http.close()
         await super().close()
 
 
 def create_bot(
     *,
     config: "Config",
-    db: "Database",
+    db: "AsyncDatabase",
     calendar_service: "CalendarService",
     weather_service: "WeatherService",
     geocoding_service: "GeocodingService",
     daily_summary_service: "DailySummaryService",
+    async_http: "AsyncHttpClient | None" = None,
 ) -> MornyBot:
     return MornyBot(
         config=config,
@@ -83,4 +100,5 @@ def create_bot(
         weather_service=weather_service,
         geocoding_service=geocoding_service,
         daily_summary_service=daily_summary_service,
+        async_http=async_http,
     )
@@ -21,13 +21,13 @@ def register(bot) -> None:
             await interaction.response.send_message("❌ 時刻の形式が不正です。例: 07:30")
             return
 
-        bot.db.set_morning_on(
+        settings = await bot.db.set_morning_on(
             str(interaction.user.id),
             morning_time=notify_time,
             notify_channel_id=str(interaction.channel_id),
         )
         if bot.morning_scheduler:
-            bot.morning_scheduler.on_user_settings_updated(str(interaction.user.id))
+            await bot.morning_scheduler.on_user_settings_updated(settings.discord_user_id, settings)
 
         await interaction.response.send_message(
             f"✅ 毎朝通知をONにしました（{notify_time}）。このチャンネルに送信します。"
@@ -35,7 +35,7 @@ def register(bot) -> None:
 
     @bot.tree.command(name="morning_off", description="毎朝通知をOFFにする")
     async def morning_off_command(interaction: discord.Interaction) -> None:
-        bot.db.set_morning_off(str(interaction.user.id))
+        settings = await bot.db.set_morning_off(str(interaction.user.id))
         if bot.morning_scheduler:
-            bot.morning_scheduler.on_user_settings_updated(str(interaction.user.id))
+            await bot.morning_scheduler.on_user_settings_updated(settings.discord_user_id, settings)
         await interaction.response.send_message("✅ 毎朝通知をOFFにしました。")
@@ -18,7 +18,9 @@ def register(bot) -> None:
             return
 
         serialized = serialize_calendar_ids(calendar_ids)
-        bot.db.set_calendar_id(str(interaction.user.id), serialized)
+        settings = await bot.db.set_calendar_id(str(interaction.user.id), serialized)
+        if bot.morning_scheduler:
+            await bot.morning_scheduler.on_user_settings_updated(settings.discord_user_id, settings)
 
         if len(calendar_ids) == 1:
             await interaction.response.send_message(f"✅ カレンダーIDを登録しました: {calendar_ids[0]}")
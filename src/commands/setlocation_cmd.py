@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 
 import discord
@@ -22,49 +21,75 @@ def register(bot) -> None:
             await interaction.response.send_message("❌ 地点を入力してください。")
             return
 
-        await interaction.response.defer(thinking=True)
+        async def reply(content: str) -> None:
+            if interaction.response.is_done():
+                await interaction.followup.send(content)
+            else:
+                await interaction.response.send_message(content)
 
         try:
             parsed = parse_lat_lon(text)
         except ValueError:
-            await interaction.followup.send("❌ 緯度経度の範囲が不正です。例: 36.08,140.11")
+            await reply("❌ 緯度経度の範囲が不正です。例: 36.08,140.11")
             return
 
         if parsed is not None:
             lat, lon = parsed
-            bot.db.set_location(
+            await interaction.response.defer(thinking=True)
+            location_name = bot.geocoding_service.reverse_label(lat, lon) or text
+            settings = await bot.db.set_location(
                 user_id,
-                location_name=text,
+                location_name=location_name,
                 latitude=lat,
                 longitude=lon,
             )
-            await interaction.followup.send(
-                f"✅ 天気取得地点を登録しました: {text} ({lat:.2f}, {lon:.2f})"
-            )
+            if bot.morning_scheduler:
+                await bot.morning_scheduler.on_user_settings_updated(user_id, settings)
+            await reply(f"✅ 天気取得地点を登録しました: {location_name} ({lat:.2f}, {lon:.2f})")
             return
 
         if looks_like_coordinate_input(text):
-            await interaction.followup.send("❌ 緯度経度の形式が不正です。例: 36.08,140.11")
+            await reply("❌ 緯度経度の形式が不正です。例: 36.08,140.11")
             return
 
-        try:
-            result = await asyncio.to_thread(bot.geocoding_service.geocode, text)
-        except GeocodingServiceError:
-            logger.exception("Geocoding failed for input=%s", text)
-            await interaction.followup.send("❌ 地名の検索に失敗しました。時間をおいて再試行してください。")
-            return
+        # 保存は単一ライター待ちになり得るので、3秒の応答期限に間に合うよう DB に触れる前に defer する。
+        await interaction.response.defer(thinking=True)
+        result = bot.geocoding_service.resolve_local(text)
+        hit = result is not None
+        if not hit:
+            hit, result = await bot.geocoding_service.lookup_cached_async(text)
+        if not hit:
+            try:
+                result = await bot.geocoding_service.fetch_async(text)
+            except GeocodingServiceError:
+                logger.exception("Geocoding failed for input=%s", text)
+                await reply("❌ 地名の検索に失敗しました。時間をおいて再試行してください。")
+                return
 
         if result is None:
-            await interaction.followup.send("❌ 地名の候補が見つかりませんでした")
+            await reply("❌ 地名の候補が見つかりませんでした")
             return
 
-        bot.db.set_location(
+        settings = await bot.db.set_location(
             user_id,
             location_name=result.location_name,
             latitude=result.latitude,
             longitude=result.longitude,
         )
-        await interaction.followup.send(
+        if bot.morning_scheduler:
+            await bot.morning_scheduler.on_user_settings_updated(user_id, settings)
+        await reply(
             "✅ 天気取得地点を登録しました: "
             f"{result.location_name} ({result.latitude:.2f}, {result.longitude:.2f})"
         )
+
+    @setlocation_command.autocomplete("location")
+    async def location_autocomplete(
+        interaction: discord.Interaction,
+        current: str,
+    ) -> list[app_commands.Choice[str]]:
+        # 同梱の地名辞書だけで返す（ネットワーク不要）。選ばれた label は resolve_local で座標に戻る。
+        return [
+            app_commands.Choice(name=result.location_name, value=result.location_name)
+            for result in bot.geocoding_service.suggest_places(current)
+        ]
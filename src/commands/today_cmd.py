@@ -16,14 +16,35 @@ def register(bot) -> None:
         await interaction.response.defer(thinking=True)
 
         user_id = str(interaction.user.id)
-        settings = bot.db.get_user_settings(user_id) or UserSettings.empty(
+        settings = await bot.db.get_user_settings(user_id) or UserSettings.empty(
             user_id, bot.config.default_timezone
         )
 
+        message: discord.WebhookMessage | None = None
+        last_content: str | None = None
+
+        async def publish(summary) -> None:
+            # 最初に揃ったセクションで返信し、以降は同じメッセージを編集して埋めていく。
+            nonlocal message, last_content
+            content = format_daily_report(settings, summary)
+            if content == last_content:
+                return
+            if message is None:
+                message = await interaction.followup.send(content, wait=True)
+            else:
+                await message.edit(content=content)
+            last_content = content
+
         try:
-            summary = await bot.daily_summary_service.build_summary_async(settings)
-            message = format_daily_report(settings, summary)
-            await interaction.followup.send(message)
+            summary = await bot.daily_summary_service.build_summary_async(
+                settings,
+                on_progress=publish if bot.config.today_progressive else None,
+            )
+            await publish(summary)
         except Exception:
             logger.exception("/today failed user=%s", user_id)
-            await interaction.followup.send("❌ 予期しないエラーが発生しました。しばらくしてから再試行してください。")
+            error_text = "❌ 予期しないエラーが発生しました。しばらくしてから再試行してください。"
+            if message is None:
+                await interaction.followup.send(error_text)
+            else:
+                await message.edit(content=error_text)
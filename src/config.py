@@ -15,6 +15,37 @@ class Config:
     google_token_file: Path
     database_path: Path
     default_timezone: str
+    database_pool_size: int = 4
+    settings_cache_size: int = 10_000
+    morning_send_concurrency: int = 8
+    morning_send_timeout_sec: float = 60.0
+    morning_prefetch_lead_sec: float = 300.0
+    morning_prefetch_max_age_sec: float = 0.0
+    morning_catchup_grace_sec: float = 900.0
+    morning_digest: bool = False
+    delivery_concurrency: int = 8
+    delivery_max_attempts: int = 5
+    delivery_backoff_sec: float = 2.0
+    delivery_send_timeout_sec: float = 30.0
+    delivery_global_rate_per_sec: float = 40.0
+    delivery_channel_rate_per_sec: float = 1.0
+    delivery_channel_burst: int = 5
+    delivery_max_ratelimit_wait_sec: float = 30.0
+    calendar_sync_enabled: bool = False
+    calendar_sync_max_age_sec: float = 300.0
+    calendar_shared_cache_ttl_sec: float = 60.0
+    summary_calendar_timeout_sec: float = 10.0
+    summary_weather_timeout_sec: float = 10.0
+    summary_timeout_sec: float = 12.0
+    today_progressive: bool = True
+    weather_cache_grid_deg: float = 0.05
+    weather_cache_refresh_sec: float = 3600.0
+    weather_cache_stale_sec: float = 600.0
+    http_pool_size: int = 10
+    http_max_retries: int = 2
+    http_backoff_factor: float = 0.5
+    geocode_cache_ttl_sec: float = 30 * 86400.0
+    geocode_negative_ttl_sec: float = 86400.0
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -41,4 +72,67 @@ class Config:
             google_token_file=token_file,
             database_path=database_path,
             default_timezone=default_timezone,
+            database_pool_size=max(1, _env_int("DATABASE_POOL_SIZE", 4)),
+            settings_cache_size=max(0, _env_int("SETTINGS_CACHE_SIZE", 10_000)),
+            morning_send_concurrency=max(1, _env_int("MORNING_SEND_CONCURRENCY", 8)),
+            morning_send_timeout_sec=_env_float("MORNING_SEND_TIMEOUT_SEC", 60.0),
+            morning_prefetch_lead_sec=max(0.0, _env_float("MORNING_PREFETCH_LEAD_SEC", 300.0)),
+            morning_prefetch_max_age_sec=max(0.0, _env_float("MORNING_PREFETCH_MAX_AGE_SEC", 0.0)),
+            morning_catchup_grace_sec=max(0.0, _env_float("MORNING_CATCHUP_GRACE_SEC", 900.0)),
+            morning_digest=_env_bool("MORNING_DIGEST", False),
+            delivery_concurrency=max(1, _env_int("DELIVERY_CONCURRENCY", 8)),
+            delivery_max_attempts=max(1, _env_int("DELIVERY_MAX_ATTEMPTS", 5)),
+            delivery_backoff_sec=max(0.0, _env_float("DELIVERY_BACKOFF_SEC", 2.0)),
+            delivery_send_timeout_sec=max(1.0, _env_float("DELIVERY_SEND_TIMEOUT_SEC", 30.0)),
+            delivery_global_rate_per_sec=max(0.0, _env_float("DELIVERY_GLOBAL_RATE_PER_SEC", 40.0)),
+            delivery_channel_rate_per_sec=max(0.0, _env_float("DELIVERY_CHANNEL_RATE_PER_SEC", 1.0)),
+            delivery_channel_burst=max(1, _env_int("DELIVERY_CHANNEL_BURST", 5)),
+            # discord.py は 30 秒未満を受け付けない。
+            delivery_max_ratelimit_wait_sec=max(30.0, _env_float("DELIVERY_MAX_RATELIMIT_WAIT_SEC", 30.0)),
+            calendar_sync_enabled=_env_bool("CALENDAR_SYNC_ENABLED", False),
+            calendar_sync_max_age_sec=max(0.0, _env_float("CALENDAR_SYNC_MAX_AGE_SEC", 300.0)),
+            calendar_shared_cache_ttl_sec=max(0.0, _env_float("CALENDAR_SHARED_CACHE_TTL_SEC", 60.0)),
+            summary_calendar_timeout_sec=max(0.1, _env_float("SUMMARY_CALENDAR_TIMEOUT_SEC", 10.0)),
+            summary_weather_timeout_sec=max(0.1, _env_float("SUMMARY_WEATHER_TIMEOUT_SEC", 10.0)),
+            summary_timeout_sec=max(0.1, _env_float("SUMMARY_TIMEOUT_SEC", 12.0)),
+            today_progressive=_env_bool("TODAY_PROGRESSIVE", True),
+            weather_cache_grid_deg=max(0.0, _env_float("WEATHER_CACHE_GRID_DEG", 0.05)),
+            weather_cache_refresh_sec=max(0.0, _env_float("WEATHER_CACHE_REFRESH_SEC", 3600.0)),
+            weather_cache_stale_sec=max(0.0, _env_float("WEATHER_CACHE_STALE_SEC", 600.0)),
+            http_pool_size=max(1, _env_int("HTTP_POOL_SIZE", 10)),
+            http_max_retries=max(0, _env_int("HTTP_MAX_RETRIES", 2)),
+            http_backoff_factor=max(0.0, _env_float("HTTP_BACKOFF_FACTOR", 0.5)),
+            geocode_cache_ttl_sec=max(0.0, _env_float("GEOCODE_CACHE_TTL_SEC", 30 * 86400.0)),
+            geocode_negative_ttl_sec=max(0.0, _env_float("GEOCODE_NEGATIVE_TTL_SEC", 86400.0)),
         )
+
+
+def _env_int(key: str, default: int) -> int:
+    raw = (os.getenv(key) or "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise ValueError(f"{key} には整数を設定してください。") from exc
+
+
+def _env_bool(key: str, default: bool) -> bool:
+    raw = (os.getenv(key) or "").strip().lower()
+    if not raw:
+        return default
+    if raw in {"1", "true", "yes", "on"}:
+        return True
+    if raw in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(f"{key} には true / false を設定してください。")
+
+
+def _env_float(key: str, default: float) -> float:
+    raw = (os.getenv(key) or "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError as exc:
+        raise ValueError(f"{key} には数値を設定してください。") from exc
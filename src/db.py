@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import queue
 import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
 from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
-from src.utils.time_utils import iso_now_utc
-from src.utils.validators import parse_stored_calendar_ids
+from src.utils.time_utils import FIRE_WINDOW, format_utc, iso_now_utc, next_fire_utc, parse_utc
+from src.utils.validators import is_valid_hhmm, parse_stored_calendar_ids
 
 
 @dataclass(slots=True)
@@ -22,6 +28,7 @@ class UserSettings:
     notify_channel_id: str | None
     created_at: str
     updated_at: str
+    next_fire_utc: str | None = None
 
     @property
     def morning_enabled_bool(self) -> bool:
@@ -49,6 +56,155 @@ class UserSettings:
         )
 
 
+@dataclass(slots=True)
+class OutboxMessage:
+    id: int
+    channel_id: str
+    content: str
+    attempts: int
+
+
+class _ConnectionPool:
+    # 接続ごとに文キャッシュを持つので、使い回すほど SQL のパースが省ける。
+    PRAGMAS = (
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA busy_timeout = 5000",
+    )
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        size: int,
+        mmap_size: int,
+        cache_size_kib: int,
+        cached_statements: int,
+    ):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Database connection pool is closed.")
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if not create:
+            return self._idle.get()
+        try:
+            return self._open()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            closed = self._closed
+            if closed:
+                self._created -= 1
+        if closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=5.0,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size_kib)}")
+        return conn
+
+
+class _SettingsCache:
+    def __init__(self, capacity: int):
+        self.capacity = max(0, capacity)
+        self._entries: OrderedDict[str, UserSettings] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, discord_user_id: str) -> UserSettings | None:
+        with self._lock:
+            settings = self._entries.get(discord_user_id)
+            if settings is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(discord_user_id)
+            self.hits += 1
+            return settings
+
+    def peek(self, discord_user_id: str) -> UserSettings | None:
+        with self._lock:
+            settings = self._entries.get(discord_user_id)
+            if settings is not None:
+                self._entries.move_to_end(discord_user_id)
+                self.hits += 1
+            return settings
+
+    def put(self, settings: UserSettings, *, keep_existing: bool = False) -> None:
+        if not self.capacity:
+            return
+        with self._lock:
+            if keep_existing and settings.discord_user_id in self._entries:
+                # 読み取り中に書き込みが先に反映された場合は新しい方を残す。
+                return
+            self._entries[settings.discord_user_id] = settings
+            self._entries.move_to_end(settings.discord_user_id)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, discord_user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(discord_user_id, None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
 class Database:
     _ALLOWED_COLUMNS = {
         "calendar_id",
@@ -60,13 +216,34 @@ class Database:
         "morning_time",
         "notify_channel_id",
     }
+    # これらが変わったら next_fire_utc を再計算する。
+    _SCHEDULE_COLUMNS = {"morning_enabled", "morning_time", "timezone"}
 
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        pool_size: int = 4,
+        mmap_size: int = 64 * 1024 * 1024,
+        cache_size_kib: int = 16 * 1024,
+        cached_statements: int = 256,
+        settings_cache_size: int = 10_000,
+    ):
         self.db_path = Path(db_path)
+        self._settings_cache = _SettingsCache(settings_cache_size)
+        self._pool = _ConnectionPool(
+            self.db_path,
+            size=pool_size,
+            mmap_size=mmap_size,
+            cache_size_kib=cache_size_kib,
+            cached_statements=cached_statements,
+        )
 
     def init_db(self) -> None:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         with self._connect() as conn:
+            # WAL はDBファイルに永続化されるので初期化時に一度だけ設定すればよい。
+            conn.execute("PRAGMA journal_mode = WAL")
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS user_settings (
@@ -80,16 +257,158 @@ class Database:
                     morning_time TEXT NOT NULL DEFAULT '07:30',
                     notify_channel_id TEXT NULL,
                     created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
+                    updated_at TEXT NOT NULL,
+                    next_fire_utc TEXT NULL
                 )
                 """
             )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(user_settings)")}
+            if "next_fire_utc" not in columns:
+                conn.execute("ALTER TABLE user_settings ADD COLUMN next_fire_utc TEXT NULL")
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_user_settings_due
+                ON user_settings (morning_enabled, next_fire_utc)
+                """
+            )
+            self._backfill_next_fire(conn)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS morning_deliveries (
+                    discord_user_id TEXT NOT NULL,
+                    local_date TEXT NOT NULL,
+                    channel_id TEXT NULL,
+                    sent_at TEXT NOT NULL,
+                    PRIMARY KEY (discord_user_id, local_date)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_morning_deliveries_local_date
+                ON morning_deliveries (local_date)
+                """
+            )
+            self._init_calendar_store(conn)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS geocode_cache (
+                    query_key TEXT PRIMARY KEY,
+                    location_name TEXT NULL,
+                    latitude REAL NULL,
+                    longitude REAL NULL,
+                    expires_at TEXT NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute("DELETE FROM geocode_cache WHERE expires_at <= ?", (format_utc(datetime.now(timezone.utc)),))
+            self._init_outbox(conn)
             conn.commit()
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def _init_outbox(self, conn: sqlite3.Connection) -> None:
+        # status: pending（送信待ち）→ queued（配送側が取り込み済み）→ sending → sent / failed
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TEXT NOT NULL,
+                last_error TEXT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_outbox_ready
+            ON outbox (status, next_attempt_at)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_outbox_channel
+            ON outbox (channel_id, status, id)
+            """
+        )
+        now = format_utc(datetime.now(timezone.utc))
+        # 取り込んだだけで送っていないものは戻す。送信中に落ちたものは届いた可能性があるので再送しない。
+        conn.execute("UPDATE outbox SET status = 'pending', updated_at = ? WHERE status = 'queued'", (now,))
+        conn.execute(
+            """
+            UPDATE outbox SET status = 'failed', last_error = 'interrupted while sending', updated_at = ?
+            WHERE status = 'sending'
+            """,
+            (now,),
+        )
+
+    def _init_calendar_store(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS calendar_events (
+                calendar_id TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                summary TEXT NULL,
+                all_day INTEGER NOT NULL,
+                start_utc TEXT NULL,
+                end_utc TEXT NULL,
+                start_date TEXT NULL,
+                end_date TEXT NULL,
+                start_json TEXT NOT NULL,
+                end_json TEXT NOT NULL,
+                PRIMARY KEY (calendar_id, event_id)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_calendar_events_range
+            ON calendar_events (calendar_id, all_day, start_utc, start_date)
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS calendar_sync_state (
+                calendar_id TEXT PRIMARY KEY,
+                sync_token TEXT NULL,
+                synced_at TEXT NOT NULL,
+                full_synced_at TEXT NULL
+            )
+            """
+        )
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(calendar_sync_state)")}
+        if "full_synced_at" not in columns:
+            conn.execute("ALTER TABLE calendar_sync_state ADD COLUMN full_synced_at TEXT NULL")
+
+    def _backfill_next_fire(self, conn: sqlite3.Connection) -> None:
+        rows = conn.execute(
+            "SELECT * FROM user_settings WHERE morning_enabled = 1 AND next_fire_utc IS NULL"
+        ).fetchall()
+        if not rows:
+            return
+        after = datetime.now(timezone.utc) - FIRE_WINDOW
+        conn.executemany(
+            "UPDATE user_settings SET next_fire_utc = ? WHERE discord_user_id = ?",
+            [
+                (_compute_next_fire(self._row_to_user_settings(row), after=after), row["discord_user_id"])
+                for row in rows
+            ],
+        )
+
+    def close(self) -> None:
+        self._pool.close()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._pool.release(conn)
 
     def _row_to_user_settings(self, row: sqlite3.Row) -> UserSettings:
         return UserSettings(
@@ -104,15 +423,31 @@ class Database:
             notify_channel_id=row["notify_channel_id"],
             created_at=row["created_at"],
             updated_at=row["updated_at"],
+            next_fire_utc=row["next_fire_utc"],
         )
 
     def get_user_settings(self, discord_user_id: str) -> UserSettings | None:
+        cached = self._settings_cache.get(discord_user_id)
+        if cached is not None:
+            return cached
+
         with self._connect() as conn:
             row = conn.execute(
                 "SELECT * FROM user_settings WHERE discord_user_id = ?",
                 (discord_user_id,),
             ).fetchone()
-        return self._row_to_user_settings(row) if row else None
+        if row is None:
+            return None
+        settings = self._row_to_user_settings(row)
+        self._settings_cache.put(settings, keep_existing=True)
+        return settings
+
+    def peek_user_settings(self, discord_user_id: str) -> UserSettings | None:
+        # キャッシュのみを見る。イベントループ上からスレッドを介さずに呼べる。
+        return self._settings_cache.peek(discord_user_id)
+
+    def settings_cache_stats(self) -> dict[str, int]:
+        return self._settings_cache.stats()
 
     def list_morning_enabled_users(self) -> list[UserSettings]:
         with self._connect() as conn:
@@ -121,7 +456,328 @@ class Database:
             ).fetchall()
         return [self._row_to_user_settings(row) for row in rows]
 
-    def upsert_user_settings(self, discord_user_id: str, **fields: Any) -> None:
+    def list_user_locations(self) -> list[tuple[str, str | None, float, float]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT discord_user_id, location_name, latitude, longitude FROM user_settings
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+                """
+            ).fetchall()
+        return [(row["discord_user_id"], row["location_name"], row["latitude"], row["longitude"]) for row in rows]
+
+    def set_location_names(self, updates: list[tuple[str, str]]) -> int:
+        now = iso_now_utc()
+        with self._connect() as conn:
+            cursor = conn.executemany(
+                "UPDATE user_settings SET location_name = ?, updated_at = ? WHERE discord_user_id = ?",
+                [(location_name, now, discord_user_id) for discord_user_id, location_name in updates],
+            )
+            conn.commit()
+        for discord_user_id, _ in updates:
+            self._settings_cache.discard(discord_user_id)
+        return cursor.rowcount
+
+    def list_due_users(self, now_utc: datetime, window: timedelta) -> list[UserSettings]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM user_settings
+                WHERE morning_enabled = 1 AND next_fire_utc > ? AND next_fire_utc <= ?
+                ORDER BY next_fire_utc
+                """,
+                (format_utc(now_utc - window), format_utc(now_utc)),
+            ).fetchall()
+        return [self._row_to_user_settings(row) for row in rows]
+
+    def advance_next_fire(self, discord_user_id: str, *, after: datetime) -> UserSettings | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM user_settings WHERE discord_user_id = ?",
+                (discord_user_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            next_fire = _compute_next_fire(self._row_to_user_settings(row), after=after)
+            row = conn.execute(
+                "UPDATE user_settings SET next_fire_utc = ? WHERE discord_user_id = ? RETURNING *",
+                (next_fire, discord_user_id),
+            ).fetchone()
+            conn.commit()
+        settings = self._row_to_user_settings(row)
+        self._settings_cache.put(settings)
+        return settings
+
+    def has_delivery(self, discord_user_id: str, local_date: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM morning_deliveries WHERE discord_user_id = ? AND local_date = ?",
+                (discord_user_id, local_date),
+            ).fetchone()
+        return row is not None
+
+    def prune_deliveries(self, before_local_date: str) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM morning_deliveries WHERE local_date < ?",
+                (before_local_date,),
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def enqueue_outbox(
+        self,
+        messages: list[tuple[str, str]],
+        *,
+        deliveries: Sequence[tuple[str, str]] = (),
+    ) -> int:
+        # messages: (channel_id, content)、deliveries: (discord_user_id, local_date)
+        # 送信記録と同じトランザクションで積むので、同じユーザー・同じ日の通知は二重に積まれない。
+        now = format_utc(datetime.now(timezone.utc))
+        with self._connect() as conn:
+            if deliveries:
+                claimed = 0
+                for discord_user_id, local_date in deliveries:
+                    claimed += conn.execute(
+                        """
+                        INSERT OR IGNORE INTO morning_deliveries (discord_user_id, local_date, channel_id, sent_at)
+                        VALUES (?, ?, ?, ?)
+                        """,
+                        (discord_user_id, local_date, messages[0][0] if messages else None, now),
+                    ).rowcount
+                if not claimed:
+                    return 0
+            conn.executemany(
+                """
+                INSERT INTO outbox (channel_id, content, next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [(channel_id, content, now, now, now) for channel_id, content in messages],
+            )
+            conn.commit()
+        return len(messages)
+
+    def claim_outbox(self, now_utc: datetime, *, limit: int) -> list[OutboxMessage]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                UPDATE outbox SET status = 'queued', updated_at = :updated_at
+                WHERE id IN (
+                    SELECT id FROM outbox AS ready
+                    WHERE status = 'pending' AND next_attempt_at <= :now
+                    -- 同じチャンネルの先行メッセージが再送待ちの間は、後続を追い越させない。
+                    AND NOT EXISTS (
+                        SELECT 1 FROM outbox AS earlier
+                        WHERE earlier.channel_id = ready.channel_id
+                        AND earlier.status = 'pending'
+                        AND earlier.id < ready.id
+                        AND earlier.next_attempt_at > :now
+                    )
+                    ORDER BY next_attempt_at, id
+                    LIMIT :limit
+                )
+                RETURNING id, channel_id, content, attempts
+                """,
+                {"updated_at": format_utc(datetime.now(timezone.utc)), "now": format_utc(now_utc), "limit": limit},
+            ).fetchall()
+            conn.commit()
+        messages = [OutboxMessage(row["id"], row["channel_id"], row["content"], row["attempts"]) for row in rows]
+        messages.sort(key=lambda message: message.id)
+        return messages
+
+    def release_outbox(self, message_ids: list[int]) -> None:
+        # 取り込んだが送らなかったメッセージを送信待ちに戻す。
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE outbox SET status = 'pending', updated_at = ? WHERE id = ? AND status = 'queued'",
+                [(format_utc(datetime.now(timezone.utc)), message_id) for message_id in message_ids],
+            )
+            conn.commit()
+
+    def next_outbox_attempt(self) -> datetime | None:
+        with self._connect() as conn:
+            # 後続は先頭の再送待ちを追い越せない（claim_outbox と同じ順序制約）ので、各チャンネルの先頭だけを見る。
+            row = conn.execute(
+                """
+                SELECT MIN(next_attempt_at) AS next_at FROM outbox AS head
+                WHERE status = 'pending'
+                AND NOT EXISTS (
+                    SELECT 1 FROM outbox AS earlier
+                    WHERE earlier.channel_id = head.channel_id
+                    AND earlier.status = 'pending'
+                    AND earlier.id < head.id
+                )
+                """
+            ).fetchone()
+        return parse_utc(row["next_at"]) if row and row["next_at"] else None
+
+    def set_outbox_status(
+        self,
+        message_id: int,
+        status: str,
+        *,
+        error: str | None = None,
+        next_attempt_at: datetime | None = None,
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE outbox SET
+                    status = ?,
+                    attempts = attempts + (? = 'sending'),
+                    last_error = COALESCE(?, last_error),
+                    next_attempt_at = COALESCE(?, next_attempt_at),
+                    updated_at = ?
+                WHERE id = ?
+                """,
+                (
+                    status,
+                    status,
+                    error,
+                    format_utc(next_attempt_at) if next_attempt_at else None,
+                    format_utc(datetime.now(timezone.utc)),
+                    message_id,
+                ),
+            )
+            conn.commit()
+
+    def prune_outbox(self, before_utc: datetime) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM outbox WHERE status IN ('sent', 'failed') AND updated_at < ?",
+                (format_utc(before_utc),),
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def outbox_stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS count FROM outbox GROUP BY status").fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+    def get_cached_geocode(self, query_key: str) -> tuple[str | None, float | None, float | None] | None:
+        # 見つからなかった地名も latitude/longitude が NULL の行として残る（ネガティブキャッシュ）。
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT location_name, latitude, longitude FROM geocode_cache
+                WHERE query_key = ? AND expires_at > ?
+                """,
+                (query_key, format_utc(datetime.now(timezone.utc))),
+            ).fetchone()
+        return (row["location_name"], row["latitude"], row["longitude"]) if row else None
+
+    def put_cached_geocode(
+        self,
+        query_key: str,
+        *,
+        location_name: str | None,
+        latitude: float | None,
+        longitude: float | None,
+        ttl: timedelta,
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO geocode_cache (query_key, location_name, latitude, longitude, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (query_key, location_name, latitude, longitude, format_utc(datetime.now(timezone.utc) + ttl)),
+            )
+            conn.commit()
+
+    def get_calendar_sync_state(self, calendar_id: str) -> tuple[str | None, str, str | None] | None:
+        # (sync_token, synced_at, full_synced_at)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT sync_token, synced_at, full_synced_at FROM calendar_sync_state WHERE calendar_id = ?",
+                (calendar_id,),
+            ).fetchone()
+        return (row["sync_token"], row["synced_at"], row["full_synced_at"]) if row else None
+
+    def apply_calendar_changes(
+        self,
+        calendar_id: str,
+        *,
+        upserts: list[dict[str, Any]],
+        deleted_event_ids: list[str],
+        sync_token: str | None,
+        full: bool,
+        prune_before: datetime | None = None,
+    ) -> None:
+        with self._connect() as conn:
+            if full:
+                conn.execute("DELETE FROM calendar_events WHERE calendar_id = ?", (calendar_id,))
+            if deleted_event_ids:
+                conn.executemany(
+                    "DELETE FROM calendar_events WHERE calendar_id = ? AND event_id = ?",
+                    [(calendar_id, event_id) for event_id in deleted_event_ids],
+                )
+            if upserts:
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO calendar_events (
+                        calendar_id, event_id, summary, all_day, start_utc, end_utc,
+                        start_date, end_date, start_json, end_json
+                    )
+                    VALUES (
+                        :calendar_id, :event_id, :summary, :all_day, :start_utc, :end_utc,
+                        :start_date, :end_date, :start_json, :end_json
+                    )
+                    """,
+                    [{**row, "calendar_id": calendar_id} for row in upserts],
+                )
+            if prune_before is not None:
+                # 差分同期は終わった予定を消さないので、参照範囲より前に終わった行をここで落とす。
+                # 終日予定の日付はローカル日付なので、タイムゾーン差の分だけ1日余裕を持たせる。
+                conn.execute(
+                    """
+                    DELETE FROM calendar_events
+                    WHERE calendar_id = ? AND (
+                        (all_day = 0 AND end_utc < ?) OR (all_day = 1 AND end_date < ?)
+                    )
+                    """,
+                    (
+                        calendar_id,
+                        format_utc(prune_before),
+                        (prune_before - timedelta(days=1)).date().isoformat(),
+                    ),
+                )
+            conn.execute(
+                """
+                INSERT INTO calendar_sync_state (calendar_id, sync_token, synced_at, full_synced_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(calendar_id) DO UPDATE SET
+                    sync_token = excluded.sync_token,
+                    synced_at = excluded.synced_at,
+                    full_synced_at = COALESCE(excluded.full_synced_at, calendar_sync_state.full_synced_at)
+                """,
+                (calendar_id, sync_token, iso_now_utc(), iso_now_utc() if full else None),
+            )
+            conn.commit()
+
+    def list_calendar_events(
+        self,
+        calendar_id: str,
+        *,
+        day_start_utc: str,
+        day_end_utc: str,
+        local_date: str,
+    ) -> list[sqlite3.Row]:
+        with self._connect() as conn:
+            return conn.execute(
+                """
+                SELECT summary, all_day, start_utc, start_json, end_json FROM calendar_events
+                WHERE calendar_id = ? AND all_day = 1 AND start_date <= ? AND end_date > ?
+                UNION ALL
+                SELECT summary, all_day, start_utc, start_json, end_json FROM calendar_events
+                WHERE calendar_id = ? AND all_day = 0 AND start_utc < ? AND end_utc > ?
+                ORDER BY all_day DESC, start_utc
+                """,
+                (calendar_id, local_date, local_date, calendar_id, day_end_utc, day_start_utc),
+            ).fetchall()
+
+    def upsert_user_settings(self, discord_user_id: str, **fields: Any) -> UserSettings:
         invalid = set(fields) - self._ALLOWED_COLUMNS
         if invalid:
             raise ValueError(f"Unsupported columns in upsert: {sorted(invalid)}")
@@ -139,13 +795,26 @@ class Database:
             INSERT INTO user_settings ({', '.join(columns)})
             VALUES ({placeholders})
             ON CONFLICT(discord_user_id) DO UPDATE SET {update_clause}
+            RETURNING *
         """
         with self._connect() as conn:
-            conn.execute(sql, values)
+            row = conn.execute(sql, values).fetchone()
+            if self._SCHEDULE_COLUMNS & fields.keys():
+                next_fire = _compute_next_fire(
+                    self._row_to_user_settings(row),
+                    after=datetime.now(timezone.utc) - FIRE_WINDOW,
+                )
+                row = conn.execute(
+                    "UPDATE user_settings SET next_fire_utc = ? WHERE discord_user_id = ? RETURNING *",
+                    (next_fire, discord_user_id),
+                ).fetchone()
             conn.commit()
+        settings = self._row_to_user_settings(row)
+        self._settings_cache.put(settings)
+        return settings
 
-    def set_calendar_id(self, discord_user_id: str, calendar_id: str) -> None:
-        self.upsert_user_settings(discord_user_id, calendar_id=calendar_id)
+    def set_calendar_id(self, discord_user_id: str, calendar_id: str) -> UserSettings:
+        return self.upsert_user_settings(discord_user_id, calendar_id=calendar_id)
 
     def set_location(
         self,
@@ -154,8 +823,8 @@ class Database:
         location_name: str,
         latitude: float,
         longitude: float,
-    ) -> None:
-        self.upsert_user_settings(
+    ) -> UserSettings:
+        return self.upsert_user_settings(
             discord_user_id,
             location_name=location_name,
             latitude=latitude,
@@ -168,13 +837,19 @@ class Database:
         *,
         morning_time: str,
         notify_channel_id: str,
-    ) -> None:
-        self.upsert_user_settings(
+    ) -> UserSettings:
+        return self.upsert_user_settings(
             discord_user_id,
             morning_enabled=1,
             morning_time=morning_time,
             notify_channel_id=notify_channel_id,
         )
 
-    def set_morning_off(self, discord_user_id: str) -> None:
-        self.upsert_user_settings(discord_user_id, morning_enabled=0)
+    def set_morning_off(self, discord_user_id: str) -> UserSettings:
+        return self.upsert_user_settings(discord_user_id, morning_enabled=0)
+
+
+def _compute_next_fire(settings: UserSettings, *, after: datetime) -> str | None:
+    if not settings.morning_enabled_bool or not is_valid_hhmm(settings.morning_time):
+        return None
+    return format_utc(next_fire_utc(settings.morning_time, settings.timezone or "Asia/Tokyo", after=after))
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from src.async_db import AsyncDatabase
+from src.db import OutboxMessage
+from src.utils.token_bucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+CLAIM_BATCH = 200
+IDLE_POLL_SEC = 30.0
+NOT_READY_RETRY_SEC = 5.0
+BACKOFF_CAP_SEC = 300.0
+OUTBOX_RETENTION = timedelta(days=3)
+OUTBOX_PRUNE_INTERVAL_SEC = 3600.0
+
+
+class DeliveryDispatcher:
+    # outbox の行をチャンネルごとに順番どおり送る。送信前に sending を記録し、結果が分からないものは再送しない。
+
+    def __init__(
+        self,
+        *,
+        bot,
+        db: AsyncDatabase,
+        concurrency: int = 8,
+        max_attempts: int = 5,
+        backoff_sec: float = 2.0,
+        send_timeout_sec: float = 30.0,
+        global_rate_per_sec: float = 40.0,
+        channel_rate_per_sec: float = 1.0,
+        channel_burst: int = 5,
+    ):
+        self.bot = bot
+        self.db = db
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_sec = max(0.0, backoff_sec)
+        self.send_timeout_sec = send_timeout_sec
+        self.channel_rate_per_sec = max(0.0, channel_rate_per_sec)
+        self.channel_burst = max(1, channel_burst)
+        self._global_bucket = TokenBucket(rate=global_rate_per_sec, capacity=max(1.0, global_rate_per_sec))
+        self._channel_buckets: dict[str, TokenBucket] = {}
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._queues: dict[str, deque[OutboxMessage]] = {}
+        self._workers: dict[str, asyncio.Task[None]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._background: set[asyncio.Task[None]] = set()
+        self._last_prune = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Delivery dispatcher started")
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        # 取り込み済みで未送信の行は queued のまま残り、次回起動時に pending へ戻る。
+        tasks = [task for task in (self._task, *self._workers.values(), *self._background) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._workers.clear()
+        self._queues.clear()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            delay = NOT_READY_RETRY_SEC
+            if self.bot.is_ready():
+                try:
+                    delay = await self._claim_ready()
+                except Exception:
+                    logger.exception("Failed to claim outbox messages")
+                    delay = NOT_READY_RETRY_SEC
+                self._maybe_prune()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim_ready(self) -> float:
+        now = _utc_now()
+        messages = await self.db.claim_outbox(now, limit=CLAIM_BATCH)
+        for message in messages:
+            self._queues.setdefault(message.channel_id, deque()).append(message)
+            if message.channel_id not in self._workers:
+                self._workers[message.channel_id] = asyncio.create_task(self._drain_channel(message.channel_id))
+        if len(messages) >= CLAIM_BATCH:
+            return 0.0
+
+        next_at = await self.db.next_outbox_attempt()
+        if next_at is None:
+            return IDLE_POLL_SEC
+        return min(IDLE_POLL_SEC, max(0.0, (next_at - _utc_now()).total_seconds()))
+
+    async def _drain_channel(self, channel_id: str) -> None:
+        queue = self._queues[channel_id]
+        try:
+            while queue:
+                message = queue.popleft()
+                try:
+                    rescheduled = await self._deliver(message)
+                except Exception as exc:
+                    logger.exception("Delivery failed unexpectedly id=%d channel=%s", message.id, channel_id)
+                    # 送ったかどうか分からないので再送はせず、queued/sending のまま残さないよう failed にする。
+                    try:
+                        await self.db.set_outbox_status(
+                            message.id, "failed", error=f"unexpected error: {type(exc).__name__}"
+                        )
+                    except Exception:
+                        logger.exception("Failed to mark outbox message failed id=%d", message.id)
+                    continue
+                if rescheduled:
+                    # 後続が先に届かないよう、このチャンネルは再送まで止めて残りを送信待ちに戻す。
+                    rest = [queued.id for queued in queue]
+                    queue.clear()
+                    if rest:
+                        await self.db.release_outbox(rest)
+                    break
+        finally:
+            self._queues.pop(channel_id, None)
+            self._workers.pop(channel_id, None)
+
+    async def _deliver(self, message: OutboxMessage) -> bool:
+        # 再送待ちに回した場合は True。
+        bucket = self._channel_bucket(message.channel_id)
+        await bucket.acquire()
+        await self._global_bucket.acquire()
+        async with self._semaphore:
+            channel = await self._resolve_channel(message.channel_id)
+            if channel is None:
+                logger.warning("Notify channel not found id=%d channel_id=%s", message.id, message.channel_id)
+                await self.db.set_outbox_status(message.id, "failed", error="channel not found")
+                return False
+
+            # 送る前に sending を記録する。ここから先で落ちたら届いたか分からないので再送しない。
+            await self.db.set_outbox_status(message.id, "sending")
+            attempts = message.attempts + 1
+            try:
+                await asyncio.wait_for(channel.send(message.content), timeout=self.send_timeout_sec)
+            except discord.RateLimited as exc:
+                # discord.py が待たずに返した 429（待ち時間が max_ratelimit_timeout を超えた）。
+                bucket.block_for(exc.retry_after)
+                return await self._retry(message, attempts, exc.retry_after, "rate limited")
+            except discord.HTTPException as exc:
+                retry_after = self._apply_rate_limit_headers(exc, bucket)
+                if exc.status == 429 or exc.status >= 500:
+                    return await self._retry(message, attempts, retry_after, f"HTTP {exc.status}")
+                else:
+                    logger.warning(
+                        "Delivery rejected id=%d channel=%s status=%s", message.id, message.channel_id, exc.status
+                    )
+                    await self.db.set_outbox_status(message.id, "failed", error=f"HTTP {exc.status}: {exc.text}")
+            except Exception as exc:
+                logger.warning(
+                    "Delivery outcome unknown id=%d channel=%s (%s); not retrying",
+                    message.id,
+                    message.channel_id,
+                    type(exc).__name__,
+                )
+                await self.db.set_outbox_status(message.id, "failed", error=f"unknown outcome: {type(exc).__name__}")
+            else:
+                await self.db.set_outbox_status(message.id, "sent")
+                logger.info("Delivered id=%d channel=%s attempts=%d", message.id, message.channel_id, attempts)
+        return False
+
+    async def _retry(self, message: OutboxMessage, attempts: int, retry_after: float | None, error: str) -> bool:
+        if attempts >= self.max_attempts:
+            logger.warning(
+                "Delivery gave up id=%d channel=%s attempts=%d (%s)", message.id, message.channel_id, attempts, error
+            )
+            await self.db.set_outbox_status(message.id, "failed", error=error)
+            return False
+
+        backoff = min(self.backoff_sec * (2 ** (attempts - 1)), BACKOFF_CAP_SEC)
+        delay = max(retry_after or 0.0, backoff / 2 + random.uniform(0.0, backoff / 2))
+        logger.info(
+            "Delivery retry scheduled id=%d channel=%s attempts=%d delay=%.1fs (%s)",
+            message.id,
+            message.channel_id,
+            attempts,
+            delay,
+            error,
+        )
+        await self.db.set_outbox_status(
+            message.id,
+            "pending",
+            error=error,
+            next_attempt_at=_utc_now() + timedelta(seconds=delay),
+        )
+        self.wake()
+        return True
+
+    def _apply_rate_limit_headers(self, exc: discord.HTTPException, bucket: TokenBucket) -> float | None:
+        headers = getattr(exc.response, "headers", None) or {}
+        retry_after = _header_float(headers, "Retry-After")
+        if retry_after is None and headers.get("X-RateLimit-Remaining") == "0":
+            retry_after = _header_float(headers, "X-RateLimit-Reset-After")
+        if retry_after is None:
+            return None
+        if headers.get("X-RateLimit-Global") == "true" or headers.get("X-RateLimit-Scope") == "global":
+            self._global_bucket.block_for(retry_after)
+        else:
+            bucket.block_for(retry_after)
+        return retry_after
+
+    def _channel_bucket(self, channel_id: str) -> TokenBucket:
+        bucket = self._channel_buckets.get(channel_id)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.channel_rate_per_sec, capacity=self.channel_burst)
+            self._channel_buckets[channel_id] = bucket
+        return bucket
+
+    async def _resolve_channel(self, channel_id_str: str):
+        try:
+            channel_id = int(channel_id_str)
+        except ValueError:
+            return None
+
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None:
+            return channel
+
+        try:
+            return await self.bot.fetch_channel(channel_id)
+        except Exception:
+            logger.exception("Failed to fetch channel %s", channel_id)
+            return None
+
+    def _maybe_prune(self) -> None:
+        if time.monotonic() - self._last_prune < OUTBOX_PRUNE_INTERVAL_SEC:
+            return
+        self._last_prune = time.monotonic()
+        # 送信中でなく、満タンで制限もかかっていないバケットは作り直しても同じなので捨てる。
+        for channel_id in [
+            channel_id
+            for channel_id, bucket in self._channel_buckets.items()
+            if channel_id not in self._workers and bucket.idle()
+        ]:
+            del self._channel_buckets[channel_id]
+        task = asyncio.create_task(self._prune())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _prune(self) -> None:
+        try:
+            removed = await self.db.prune_outbox(_utc_now() - OUTBOX_RETENTION)
+            stats = await self.db.outbox_stats()
+        except Exception:
+            logger.exception("Failed to prune outbox")
+            return
+        logger.info("Outbox stats %s (pruned %d)", stats, removed)
+
+
+def _header_float(headers, key: str) -> float | None:
+    raw = headers.get(key)
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return None
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
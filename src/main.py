@@ -6,14 +6,17 @@ import logging
 import os
 from pathlib import Path
 
+from src.async_db import AsyncDatabase
 from src.bot import create_bot
 from src.config import Config
 from src.db import Database
+from src.delivery import DeliveryDispatcher
 from src.scheduler import MorningScheduler
 from src.services.calendar_service import CalendarService
 from src.services.daily_summary_service import DailySummaryService
 from src.services.geocoding_service import GeocodingService
 from src.services.weather_service import WeatherService
+from src.utils.http_client import AsyncHttpClient, HttpSessionPool
 
 
 def configure_logging() -> None:
@@ -94,25 +97,63 @@ def _materialize_json_file_if_missing(
 
 def main() -> None:
     configure_logging()
+    logger = logging.getLogger(__name__)
 
     config = Config.from_env()
     bootstrap_runtime_files(config)
 
-    db = Database(config.database_path)
-    db.init_db()
+    sync_db = Database(
+        config.database_path,
+        pool_size=config.database_pool_size,
+        settings_cache_size=config.settings_cache_size,
+    )
+    sync_db.init_db()
+    db = AsyncDatabase(sync_db, read_workers=max(1, config.database_pool_size - 1))
 
     calendar_service = CalendarService(
         client_secret_file=config.google_client_secret_file,
         token_file=config.google_token_file,
         default_timezone=config.default_timezone,
+        event_store=db if config.calendar_sync_enabled else None,
+        sync_max_age_sec=config.calendar_sync_max_age_sec,
+        shared_cache_ttl_sec=config.calendar_shared_cache_ttl_sec,
+    )
+    http = HttpSessionPool(
+        pool_size=config.http_pool_size,
+        max_retries=config.http_max_retries,
+        backoff_factor=config.http_backoff_factor,
+    )
+    async_http = AsyncHttpClient(
+        pool_size=config.http_pool_size,
+        max_retries=config.http_max_retries,
+        backoff_factor=config.http_backoff_factor,
+    )
+    weather_service = WeatherService(
+        http=http,
+        async_http=async_http,
+        cache_grid_deg=config.weather_cache_grid_deg,
+        cache_refresh_sec=config.weather_cache_refresh_sec,
+        cache_stale_sec=config.weather_cache_stale_sec,
+    )
+    geocoding_service = GeocodingService(
+        http=http,
+        async_http=async_http,
+        cache_store=db,
+        cache_ttl_sec=config.geocode_cache_ttl_sec,
+        negative_ttl_sec=config.geocode_negative_ttl_sec,
     )
-    weather_service = WeatherService()
-    geocoding_service = GeocodingService()
     daily_summary_service = DailySummaryService(
         calendar_service=calendar_service,
         weather_service=weather_service,
+        calendar_timeout_sec=config.summary_calendar_timeout_sec,
+        weather_timeout_sec=config.summary_weather_timeout_sec,
+        summary_timeout_sec=config.summary_timeout_sec,
     )
 
+    backfilled = geocoding_service.backfill_location_names(sync_db)
+    if backfilled:
+        logger.info("Backfilled location names from coordinates rows=%d", backfilled)
+
     bot = create_bot(
         config=config,
         db=db,
@@ -120,14 +161,39 @@ def main() -> None:
         weather_service=weather_service,
         geocoding_service=geocoding_service,
         daily_summary_service=daily_summary_service,
+        async_http=async_http,
+    )
+    bot.delivery_dispatcher = DeliveryDispatcher(
+        bot=bot,
+        db=db,
+        concurrency=config.delivery_concurrency,
+        max_attempts=config.delivery_max_attempts,
+        backoff_sec=config.delivery_backoff_sec,
+        send_timeout_sec=config.delivery_send_timeout_sec,
+        global_rate_per_sec=config.delivery_global_rate_per_sec,
+        channel_rate_per_sec=config.delivery_channel_rate_per_sec,
+        channel_burst=config.delivery_channel_burst,
     )
     bot.morning_scheduler = MorningScheduler(
         bot=bot,
         db=db,
         daily_summary_service=daily_summary_service,
+        send_concurrency=config.morning_send_concurrency,
+        send_timeout_sec=config.morning_send_timeout_sec,
+        prefetch_lead_sec=config.morning_prefetch_lead_sec,
+        prefetch_max_age_sec=config.morning_prefetch_max_age_sec,
+        catchup_grace_sec=config.morning_catchup_grace_sec,
+        digest=config.morning_digest,
+        dispatcher=bot.delivery_dispatcher,
     )
 
-    bot.run(config.discord_bot_token)
+    try:
+        bot.run(config.discord_bot_token)
+    finally:
+        weather_service.close()
+        calendar_service.close()
+        http.close()
+        db.close()
 
 
 if __name__ == "__main__":
@@ -1,44 +1,90 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import timedelta
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from src.db import Database, UserSettings
-from src.services.daily_summary_service import DailySummaryService
-from src.utils.formatters import format_daily_report
-from src.utils.time_utils import now_in_timezone
+from src.async_db import AsyncDatabase
+from src.db import UserSettings
+from src.delivery import DeliveryDispatcher
+from src.services.daily_summary_service import DailySummaryResult, DailySummaryService
+from src.services.weather_service import WeatherOutcome
+from src.utils.formatters import format_daily_report, format_morning_digest
+from src.utils.time_utils import FIRE_WINDOW, get_zoneinfo, next_fire_utc, parse_utc
+from src.utils.timer_queue import TimerQueue
 from src.utils.validators import is_valid_hhmm
 
 logger = logging.getLogger(__name__)
 
+WAKE_JOB_ID = "morny-morning-wake"
+NOT_READY_RETRY = timedelta(seconds=5)
+# 先読みのジッタはリード時間のこの割合までに収め、送信直前に余裕を残す。
+PREFETCH_JITTER_RATIO = 0.8
+PREFETCH_MIN_LEAD = timedelta(seconds=10)
+DELIVERY_RETENTION = timedelta(days=3)
+DELIVERY_PRUNE_INTERVAL_SEC = 3600.0
+
+
+@dataclass(slots=True)
+class _PrefetchEntry:
+    fire_at: datetime
+    task: "asyncio.Task[tuple[DailySummaryResult, float]]"
+
 
 class MorningScheduler:
-    def __init__(self, *, bot, db: Database, daily_summary_service: DailySummaryService, poll_seconds: int = 30):
+    def __init__(
+        self,
+        *,
+        bot,
+        db: AsyncDatabase,
+        daily_summary_service: DailySummaryService,
+        send_concurrency: int = 8,
+        send_timeout_sec: float = 60.0,
+        prefetch_lead_sec: float = 300.0,
+        prefetch_max_age_sec: float = 0.0,
+        catchup_grace_sec: float = 900.0,
+        digest: bool = False,
+        dispatcher: DeliveryDispatcher | None = None,
+    ):
         self.bot = bot
         self.db = db
+        # 送信は outbox 経由で配送側に任せ、ここでは組み立てて積むだけにする。
+        self.dispatcher = dispatcher
         self.daily_summary_service = daily_summary_service
-        self.poll_seconds = poll_seconds
+        self.send_concurrency = max(1, send_concurrency)
+        self.send_timeout_sec = send_timeout_sec
+        self.prefetch_lead = timedelta(seconds=max(0.0, prefetch_lead_sec))
+        self.prefetch_max_age_sec = max(0.0, prefetch_max_age_sec)
+        # 再起動・デプロイで取りこぼした通知は、この猶予内であれば遅れて送る。
+        self.catchup_grace = max(FIRE_WINDOW, timedelta(seconds=catchup_grace_sec))
+        # 同じ枠・同じチャンネルのユーザーを1通（上限超過時は数通）にまとめて送る。
+        self.digest = digest
         self._scheduler = AsyncIOScheduler(timezone=getattr(bot.config, "default_timezone", "Asia/Tokyo"))
         self._started = False
-        self._sent_markers: set[str] = set()
+        self._last_prune = 0.0
+        self._users: dict[str, UserSettings] = {}
+        self._timers = TimerQueue()
+        self._prefetch_timers = TimerQueue()
+        self._prefetched: dict[str, _PrefetchEntry] = {}
+        self._prefetch_semaphore = asyncio.Semaphore(self.send_concurrency)
+        self._send_semaphore = asyncio.Semaphore(self.send_concurrency)
+        self._dispatch_tasks: set[asyncio.Task[None]] = set()
+        self._in_flight: set[str] = set()
 
-    def start(self) -> None:
+    async def start(self) -> None:
         if self._started:
             return
-        self._scheduler.add_job(
-            self._tick,
-            trigger="interval",
-            seconds=self.poll_seconds,
-            id="morny-morning-tick",
-            replace_existing=True,
-            coalesce=True,
-            max_instances=1,
-        )
+        await self._load_users()
         self._scheduler.start()
         self._started = True
-        logger.info("Morning scheduler started (poll=%ss)", self.poll_seconds)
+        self._arm()
+        logger.info("Morning scheduler started (users=%d)", len(self._users))
 
     def shutdown(self) -> None:
         if not self._started:
@@ -49,93 +95,470 @@ class MorningScheduler:
             logger.exception("Failed to shutdown scheduler")
         finally:
             self._started = False
+            for user_id in list(self._prefetched):
+                self._discard_prefetched(user_id)
 
-    def on_user_settings_updated(self, discord_user_id: str) -> None:
-        # ポーリング方式のためDB変更は次回tickで自動反映される。
-        # 当日送信済みマーカーを消すと同日二重送信の原因になるので、ここでは何もしない。
-        _ = discord_user_id
+    async def on_user_settings_updated(
+        self,
+        discord_user_id: str,
+        settings: UserSettings | None = None,
+    ) -> None:
+        # 送信済みの記録は morning_deliveries に残るので、同日二重送信にはならない。
+        self._discard_prefetched(discord_user_id)
+        if settings is None:
+            settings = await self.db.get_user_settings(discord_user_id)
+        if settings is None:
+            self._unschedule_user(discord_user_id)
+        else:
+            self._schedule_user(settings)
+        self._arm()
+
+    async def _load_users(self) -> None:
+        users = await self.db.list_morning_enabled_users()
+        self._users.clear()
+        self._timers.clear()
+        self._prefetch_timers.clear()
+        for settings in users:
+            self._schedule_user(settings)
+
+    def _schedule_user(self, settings: UserSettings) -> None:
+        user_id = settings.discord_user_id
+        if not settings.morning_enabled_bool or not settings.notify_channel_id:
+            self._unschedule_user(user_id)
+            return
+        if not is_valid_hhmm(settings.morning_time):
+            logger.warning("Skip invalid morning_time user=%s time=%s", user_id, settings.morning_time)
+            self._unschedule_user(user_id)
+            return
+
+        self._users[user_id] = settings
+        if settings.next_fire_utc:
+            fire_at = parse_utc(settings.next_fire_utc)
+        else:
+            fire_at = next_fire_utc(
+                settings.morning_time,
+                settings.timezone or "Asia/Tokyo",
+                after=_utc_now() - FIRE_WINDOW,
+            )
+        self._timers.schedule(user_id, fire_at)
+        self._schedule_prefetch(user_id, fire_at)
+
+    def _unschedule_user(self, discord_user_id: str) -> None:
+        self._users.pop(discord_user_id, None)
+        self._timers.cancel(discord_user_id)
+        self._prefetch_timers.cancel(discord_user_id)
+        self._discard_prefetched(discord_user_id)
+
+    def _schedule_prefetch(self, discord_user_id: str, fire_at: datetime) -> None:
+        entry = self._prefetched.get(discord_user_id)
+        if entry is not None and entry.fire_at != fire_at:
+            self._discard_prefetched(discord_user_id)
+
+        now = _utc_now()
+        if not self.prefetch_lead or fire_at - now < PREFETCH_MIN_LEAD:
+            self._prefetch_timers.cancel(discord_user_id)
+            return
+
+        jitter = random.uniform(0.0, self.prefetch_lead.total_seconds() * PREFETCH_JITTER_RATIO)
+        prefetch_at = max(fire_at - self.prefetch_lead + timedelta(seconds=jitter), now)
+        # 秒単位に丸めて同じ秒のユーザーを1回の起床にまとめる。
+        self._prefetch_timers.schedule(discord_user_id, prefetch_at.replace(microsecond=0))
+
+    def _discard_prefetched(self, discord_user_id: str) -> None:
+        entry = self._prefetched.pop(discord_user_id, None)
+        if entry is not None and not entry.task.done():
+            entry.task.cancel()
+
+    def _arm(self, *, not_before: datetime | None = None) -> None:
+        if not self._started:
+            return
+        candidates = [
+            fire_at
+            for fire_at in (self._timers.next_fire_at(), self._prefetch_timers.next_fire_at())
+            if fire_at is not None
+        ]
+        run_date = min(candidates) if candidates else None
+        if run_date is None:
+            if self._scheduler.get_job(WAKE_JOB_ID):
+                self._scheduler.remove_job(WAKE_JOB_ID)
+            return
+        if not_before is not None and run_date < not_before:
+            run_date = not_before
+        self._scheduler.add_job(
+            self._tick,
+            trigger="date",
+            run_date=run_date,
+            id=WAKE_JOB_ID,
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
 
     async def _tick(self) -> None:
         if not self.bot.is_ready():
+            self._arm(not_before=_utc_now() + NOT_READY_RETRY)
             return
 
-        users = self.db.list_morning_enabled_users()
-        for settings in users:
+        now = _utc_now()
+        prefetch_ids = [user_id for _, user_ids in self._prefetch_timers.pop_due(now) for user_id in user_ids]
+        if prefetch_ids:
+            self._start_prefetches(prefetch_ids)
+
+        popped = self._timers.pop_due(now)
+        if popped:
+            # 長引く枠が次の分の起床を塞がないよう、送信はタスクに切り出す。
+            task = asyncio.create_task(self._dispatch_due(now, popped))
+            self._dispatch_tasks.add(task)
+            task.add_done_callback(self._dispatch_tasks.discard)
+
+        self._maybe_prune_deliveries(now)
+        self._arm()
+
+    async def _dispatch_due(self, now: datetime, popped: list[tuple[datetime, list[str]]]) -> None:
+        # 対象ユーザーは next_fire_utc のインデックスから読む。メモリ上のキューは起床タイミングにだけ使う。
+        try:
+            due_users = await self.db.list_due_users(now, self.catchup_grace)
+        except Exception:
+            logger.exception(
+                "Failed to list due users; retrying in %.0fs size=%d",
+                NOT_READY_RETRY.total_seconds(),
+                sum(len(user_ids) for _, user_ids in popped),
+            )
+            # 取り出したユーザーをキューに戻して少し後に起こし直す。設定変更で積み直し済みならそちらを優先する。
+            for fire_at, user_ids in popped:
+                for user_id in user_ids:
+                    if user_id not in self._timers:
+                        self._timers.schedule(user_id, fire_at)
+            self._arm(not_before=_utc_now() + NOT_READY_RETRY)
+            return
+
+        cohorts: dict[datetime, list[UserSettings]] = {}
+        due_ids: set[str] = set()
+        for settings in due_users:
+            due_ids.add(settings.discord_user_id)
+            if settings.discord_user_id in self._in_flight:
+                continue
+            self._in_flight.add(settings.discord_user_id)
+            cohorts.setdefault(parse_utc(settings.next_fire_utc), []).append(settings)
+
+        for fire_at, user_ids in popped:
+            stale = [user_id for user_id in user_ids if user_id not in due_ids and user_id not in self._in_flight]
+            if not stale:
+                continue
+            if now - fire_at > self.catchup_grace:
+                logger.warning(
+                    "Skip missed morning notifications fire_at=%s size=%d late=%.1fs",
+                    fire_at.isoformat(),
+                    len(stale),
+                    (now - fire_at).total_seconds(),
+                )
+            for user_id in stale:
+                await self._advance_user(user_id, fire_at)
+
+        await asyncio.gather(*(self._dispatch_cohort(fire_at, users) for fire_at, users in cohorts.items()))
+
+    async def _dispatch_cohort(self, fire_at: datetime, users: list[UserSettings]) -> None:
+        latencies: list[float] = []
+        # 先読みが無いユーザーの天気は、枠ごとにまとめて1往復で取っておく。
+        weather = await self._fetch_weather_many(
+            [settings for settings in users if not self._has_prefetch(settings.discord_user_id, fire_at)]
+        )
+
+        async def run_digest(channel_id: str, channel_users: list[UserSettings]) -> None:
+            started = time.perf_counter()
             try:
-                await self._maybe_send_for_user(settings)
+                await self._enqueue_digest(channel_id, channel_users, fire_at, weather)
             except Exception:
-                logger.exception("Morning notification job failed for user=%s", settings.discord_user_id)
+                logger.exception(
+                    "Morning digest failed channel=%s users=%d", channel_id, len(channel_users)
+                )
+            finally:
+                latencies.append(time.perf_counter() - started)
+                for settings in channel_users:
+                    try:
+                        await self._advance_user(settings.discord_user_id, fire_at)
+                    finally:
+                        self._in_flight.discard(settings.discord_user_id)
+
+        async def run(settings: UserSettings) -> None:
+            user_id = settings.discord_user_id
+            async with self._send_semaphore:
+                started = time.perf_counter()
+                try:
+                    await asyncio.wait_for(
+                        self._maybe_send_for_user(settings, fire_at, weather=weather.get(user_id)),
+                        timeout=self.send_timeout_sec,
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        "Morning notification timed out user=%s timeout=%.1fs",
+                        user_id,
+                        self.send_timeout_sec,
+                    )
+                except Exception:
+                    logger.exception("Morning notification job failed for user=%s", user_id)
+                finally:
+                    latencies.append(time.perf_counter() - started)
+                    try:
+                        await self._advance_user(user_id, fire_at)
+                    finally:
+                        self._in_flight.discard(user_id)
 
-        self._cleanup_markers(users)
+        started = time.perf_counter()
+        if self.digest:
+            channels: dict[str, list[UserSettings]] = {}
+            for settings in users:
+                channels.setdefault(settings.notify_channel_id or "", []).append(settings)
+            # チャンネルごとに並行して組み立て、まとめて outbox に積む。
+            await asyncio.gather(*(run_digest(channel_id, group) for channel_id, group in channels.items()))
+        else:
+            await asyncio.gather(*(run(settings) for settings in users))
+        wall = time.perf_counter() - started
+        logger.info(
+            "Morning cohort dispatched fire_at=%s size=%d digest=%s concurrency=%d "
+            "wall=%.2fs p50=%.2fs p99=%.2fs",
+            fire_at.isoformat(),
+            len(users),
+            self.digest,
+            self.send_concurrency,
+            wall,
+            _percentile(latencies, 50),
+            _percentile(latencies, 99),
+        )
+        logger.info("Upstream fetch cache stats %s", self.daily_summary_service.cache_stats())
 
-    async def _maybe_send_for_user(self, settings: UserSettings) -> None:
+    def _start_prefetches(self, user_ids: list[str]) -> None:
+        batch: list[tuple[UserSettings, datetime]] = []
+        for user_id in user_ids:
+            settings = self._users.get(user_id)
+            fire_at = self._timers.fire_at(user_id)
+            if settings is None or fire_at is None or user_id in self._prefetched:
+                continue
+            batch.append((settings, fire_at))
+        if not batch:
+            return
+
+        # 同じ起床で先読みするユーザーの天気は1つの一括取得を共有する。
+        weather = asyncio.create_task(self._fetch_weather_many([settings for settings, _ in batch]))
+        for settings, fire_at in batch:
+            task = asyncio.create_task(self._prefetch_summary(settings, weather))
+            self._prefetched[settings.discord_user_id] = _PrefetchEntry(fire_at=fire_at, task=task)
+
+    async def _prefetch_summary(
+        self,
+        settings: UserSettings,
+        weather_batch: "asyncio.Task[dict[str, WeatherOutcome]]",
+    ) -> tuple[DailySummaryResult, float]:
+        # 1ユーザーの取り消しが共有の一括取得まで止めないよう shield する。
+        weather = (await asyncio.shield(weather_batch)).get(settings.discord_user_id)
+        async with self._prefetch_semaphore:
+            summary = await self.daily_summary_service.build_summary_async(settings, weather=weather)
+        return summary, time.monotonic()
+
+    async def _fetch_weather_many(self, users: list[UserSettings]) -> dict[str, WeatherOutcome]:
+        if not users:
+            return {}
+        try:
+            return await self.daily_summary_service.fetch_weather_many(users)
+        except Exception:
+            logger.exception("Batched weather fetch failed size=%d; falling back to per-user", len(users))
+            return {}
+
+    def _has_prefetch(self, discord_user_id: str, fire_at: datetime) -> bool:
+        entry = self._prefetched.get(discord_user_id)
+        return entry is not None and entry.fire_at == fire_at
+
+    async def _take_summary(
+        self,
+        settings: UserSettings,
+        fire_at: datetime,
+        *,
+        weather: WeatherOutcome | None = None,
+    ) -> DailySummaryResult:
+        entry = self._prefetched.pop(settings.discord_user_id, None)
+        if entry is not None and entry.fire_at == fire_at:
+            try:
+                summary, built_at = await entry.task
+            except asyncio.CancelledError:
+                if not entry.task.cancelled():
+                    raise
+            except Exception:
+                logger.exception("Prefetch failed user=%s; rebuilding", settings.discord_user_id)
+            else:
+                age = time.monotonic() - built_at
+                if not self.prefetch_max_age_sec or age <= self.prefetch_max_age_sec:
+                    return summary
+                logger.info("Prefetched summary stale user=%s age=%.1fs; rebuilding", settings.discord_user_id, age)
+        elif entry is not None and not entry.task.done():
+            entry.task.cancel()
+
+        return await self.daily_summary_service.build_summary_async(settings, weather=weather)
+
+    async def _advance_user(self, discord_user_id: str, fire_at: datetime) -> None:
+        # DB 上の最新設定から次回発火時刻を計算し直すので、送信中の設定変更もここで反映される。
+        after = max(fire_at, _utc_now() - FIRE_WINDOW)
+        try:
+            settings = await self.db.advance_next_fire(discord_user_id, after=after)
+        except Exception:
+            logger.exception("Failed to advance next_fire_utc user=%s", discord_user_id)
+            settings = self._users.get(discord_user_id)
+            if settings is not None:
+                fallback = next_fire_utc(settings.morning_time, settings.timezone or "Asia/Tokyo", after=after)
+                self._timers.schedule(discord_user_id, fallback)
+        else:
+            if settings is None:
+                self._unschedule_user(discord_user_id)
+            else:
+                self._schedule_user(settings)
+        # 送信はタスクに切り出してあり、_tick の _arm() より後にここへ来る。キューの最後の枠だった場合に
+        # 起床ジョブが消えたままにならないよう、登録し直したらその場で張り直す。
+        self._arm()
+
+    async def _maybe_send_for_user(
+        self,
+        settings: UserSettings,
+        fire_at: datetime,
+        *,
+        weather: WeatherOutcome | None = None,
+    ) -> None:
         if not settings.notify_channel_id:
             return
-        if not is_valid_hhmm(settings.morning_time):
-            logger.warning("Skip invalid morning_time user=%s time=%s", settings.discord_user_id, settings.morning_time)
+
+        local_date = _local_date(settings, fire_at)
+        if await self.db.has_delivery(settings.discord_user_id, local_date):
             return
 
-        now_local = now_in_timezone(settings.timezone or "Asia/Tokyo")
-        if now_local.strftime("%H:%M") != settings.morning_time:
+        summary = await self._take_summary(settings, fire_at, weather=weather)
+        content = format_daily_report(settings, summary, morning_mode=True, mention_user=True)
+        queued = await self._enqueue(
+            settings.notify_channel_id,
+            [content],
+            [(settings.discord_user_id, local_date)],
+        )
+        if not queued:
             return
+        lateness = _utc_now() - fire_at
+        logger.info(
+            "Morning notification queued user=%s channel=%s date=%s%s",
+            settings.discord_user_id,
+            settings.notify_channel_id,
+            local_date,
+            f" (catch-up, {lateness.total_seconds():.0f}s late)" if lateness > FIRE_WINDOW else "",
+        )
 
-        marker = f"{settings.discord_user_id}:{now_local.date().isoformat()}"
-        if marker in self._sent_markers:
+    async def _enqueue_digest(
+        self,
+        channel_id: str,
+        users: list[UserSettings],
+        fire_at: datetime,
+        weather: dict[str, WeatherOutcome],
+    ) -> None:
+        if not channel_id:
             return
 
-        channel = await self._resolve_channel(settings.notify_channel_id)
-        if channel is None:
-            logger.warning(
-                "Notify channel not found user=%s channel_id=%s",
-                settings.discord_user_id,
-                settings.notify_channel_id,
+        pending: list[tuple[UserSettings, str]] = []
+        for settings in users:
+            local_date = _local_date(settings, fire_at)
+            if not await self.db.has_delivery(settings.discord_user_id, local_date):
+                pending.append((settings, local_date))
+        if not pending:
+            return
+
+        summaries = await asyncio.gather(
+            *(
+                self._digest_summary(settings, fire_at, weather.get(settings.discord_user_id))
+                for settings, _ in pending
             )
+        )
+        included = [(entry, summary) for entry, summary in zip(pending, summaries) if summary is not None]
+        if not included:
             return
 
-        summary = await self.daily_summary_service.build_summary_async(settings)
-        content = format_daily_report(settings, summary, morning_mode=True, mention_user=True)
-        await channel.send(content)
-        self._sent_markers.add(marker)
+        messages = format_morning_digest(
+            [
+                format_daily_report(settings, summary, morning_mode=False, mention_user=True)
+                for (settings, _), summary in included
+            ]
+        )
+        queued = await self._enqueue(
+            channel_id,
+            messages,
+            [(settings.discord_user_id, local_date) for (settings, local_date), _ in included],
+        )
+        if not queued:
+            return
+        lateness = _utc_now() - fire_at
         logger.info(
-            "Morning notification sent user=%s channel=%s date=%s",
-            settings.discord_user_id,
-            settings.notify_channel_id,
-            now_local.date().isoformat(),
+            "Morning digest queued channel=%s users=%d messages=%d%s",
+            channel_id,
+            len(included),
+            len(messages),
+            f" (catch-up, {lateness.total_seconds():.0f}s late)" if lateness > FIRE_WINDOW else "",
         )
 
-    async def _resolve_channel(self, channel_id_str: str):
-        try:
-            channel_id = int(channel_id_str)
-        except ValueError:
-            return None
+    async def _enqueue(self, channel_id: str, contents: list[str], deliveries: list[tuple[str, str]]) -> int:
+        # 送信記録と outbox への追加は同じトランザクション。記録済みのユーザーだけなら何も積まない。
+        queued = await self.db.enqueue_outbox(
+            [(channel_id, content) for content in contents],
+            deliveries=deliveries,
+        )
+        if queued and self.dispatcher is not None:
+            self.dispatcher.wake()
+        return queued
+
+    async def _digest_summary(
+        self,
+        settings: UserSettings,
+        fire_at: datetime,
+        weather: WeatherOutcome | None,
+    ) -> DailySummaryResult | None:
+        # 取得できなかったユーザーだけダイジェストから外し、同じチャンネルの他のユーザーは送る。
+        async with self._send_semaphore:
+            try:
+                return await asyncio.wait_for(
+                    self._take_summary(settings, fire_at, weather=weather),
+                    timeout=self.send_timeout_sec,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Morning digest summary timed out user=%s timeout=%.1fs",
+                    settings.discord_user_id,
+                    self.send_timeout_sec,
+                )
+            except Exception:
+                logger.exception("Morning digest summary failed for user=%s", settings.discord_user_id)
+        return None
 
-        channel = self.bot.get_channel(channel_id)
-        if channel is not None:
-            return channel
+    def _maybe_prune_deliveries(self, now: datetime) -> None:
+        if time.monotonic() - self._last_prune < DELIVERY_PRUNE_INTERVAL_SEC:
+            return
+        self._last_prune = time.monotonic()
+        # ローカル日付はUTCから最大±14時間ずれるだけなので、3日前より古ければ全TZで不要。
+        cutoff = (now - DELIVERY_RETENTION).date().isoformat()
+        task = asyncio.create_task(self._prune_deliveries(cutoff))
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
 
+    async def _prune_deliveries(self, cutoff: str) -> None:
         try:
-            return await self.bot.fetch_channel(channel_id)
+            removed = await self.db.prune_deliveries(cutoff)
         except Exception:
-            logger.exception("Failed to fetch channel %s", channel_id)
-            return None
-
-    def _cleanup_markers(self, users: list[UserSettings]) -> None:
-        if not self._sent_markers:
+            logger.exception("Failed to prune morning deliveries")
             return
-        cutoff_dates = set()
-        for settings in users:
-            now_local = now_in_timezone(settings.timezone or "Asia/Tokyo")
-            cutoff_dates.add((now_local - timedelta(days=2)).date().isoformat())
-        if not cutoff_dates:
-            now_local = now_in_timezone(getattr(self.bot.config, "default_timezone", "Asia/Tokyo"))
-            cutoff_dates.add((now_local - timedelta(days=2)).date().isoformat())
-        min_cutoff = min(cutoff_dates)
-        kept = set()
-        for marker in self._sent_markers:
-            try:
-                _, date_str = marker.split(":", 1)
-            except ValueError:
-                continue
-            if date_str >= min_cutoff:
-                kept.add(marker)
-        self._sent_markers = kept
+        if removed:
+            logger.info("Pruned %d morning delivery records before %s", removed, cutoff)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _local_date(settings: UserSettings, fire_at: datetime) -> str:
+    return fire_at.astimezone(get_zoneinfo(settings.timezone or "Asia/Tokyo")).date().isoformat()
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import json
+import logging
+import threading
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -9,65 +14,401 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from src.utils.time_utils import format_hhmm, parse_iso_datetime_to_local, today_bounds_rfc3339
+from src.utils.shared_fetch import SharedFetchCache
+from src.utils.time_utils import (
+    format_hhmm,
+    format_utc,
+    now_in_timezone,
+    parse_iso_datetime_to_local,
+    parse_utc,
+    today_bounds_rfc3339,
+)
+
+if TYPE_CHECKING:
+    from src.async_db import AsyncDatabase
+
+logger = logging.getLogger(__name__)
 
 
 class CalendarServiceError(RuntimeError):
     pass
 
 
+CalendarOutcome = list[dict[str, Any]] | CalendarServiceError
+# (calendar_id, timezone, local_date)
+SharedKey = tuple[str, str, str]
+
+
 class CalendarService:
     SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
+    # Google API のバッチは1リクエストあたり最大50件。
+    BATCH_LIMIT = 50
+    # フル同期時は過去の予定を持たないよう、この日数より前は取得しない。
+    FULL_SYNC_LOOKBACK = timedelta(days=1)
+    # 繰り返し予定を無限に展開しないよう、フル同期はこの先までに限る。
+    FULL_SYNC_HORIZON = timedelta(days=14)
+    # 差分同期では範囲外の既存予定は届かないので、範囲が尽きる前にフル同期し直す。
+    FULL_RESYNC_INTERVAL = timedelta(days=7)
+    # 表示に使うフィールドだけを部分レスポンスで受け取る（説明・参加者・会議情報は不要）。
+    EVENT_FIELDS = "items(id,status,summary,start,end),nextPageToken"
+    SYNC_FIELDS = "items(id,status,summary,start,end),nextPageToken,nextSyncToken"
+    PAGE_SIZE = 250
 
-    def __init__(self, *, client_secret_file: Path, token_file: Path, default_timezone: str = "Asia/Tokyo"):
+    def __init__(
+        self,
+        *,
+        client_secret_file: Path,
+        token_file: Path,
+        default_timezone: str = "Asia/Tokyo",
+        api_endpoint: str | None = None,
+        event_store: "AsyncDatabase | None" = None,
+        sync_max_age_sec: float = 300.0,
+        shared_cache_ttl_sec: float = 60.0,
+    ):
         self.client_secret_file = Path(client_secret_file)
         self.token_file = Path(token_file)
         self.default_timezone = default_timezone
+        self.api_endpoint = api_endpoint
+        # event_store を渡すと syncToken による差分同期 + ローカルDB参照モードになる。
+        self.event_store = event_store
+        self.sync_max_age_sec = sync_max_age_sec
+        self._sync_locks: dict[str, threading.Lock] = {}
+        self._sync_locks_guard = threading.Lock()
+        # 祝日・チームカレンダーなど複数ユーザーが登録する同じカレンダーは1回の取得を共有する。
+        self._shared: SharedFetchCache[SharedKey, list[dict[str, Any]]] | None = (
+            SharedFetchCache(ttl_sec=shared_cache_ttl_sec) if shared_cache_ttl_sec > 0 else None
+        )
+        self._credentials: Credentials | None = None
+        self._credentials_lock = threading.Lock()
+        # httplib2 はスレッドセーフではないので、API クライアントはスレッドごとに持つ。
+        self._local = threading.local()
 
     def get_today_events(self, *, calendar_id: str, timezone_name: str | None = None) -> list[dict[str, Any]]:
+        tz_name = timezone_name or self.default_timezone
+        if self._shared is None:
+            return self._fetch_today_events(calendar_id, tz_name)
+        key = (calendar_id, tz_name, now_in_timezone(tz_name).date().isoformat())
+        return self._shared.get_or_load(key, lambda: self._fetch_today_events(calendar_id, tz_name))
+
+    def get_today_events_many(
+        self,
+        calendar_ids: list[str],
+        *,
+        timezone_name: str | None = None,
+    ) -> dict[str, CalendarOutcome]:
+        # カレンダーごとの結果または例外を返す。未取得分だけをまとめて取りに行く。
+        tz_name = timezone_name or self.default_timezone
+        if self._shared is None:
+            return self._fetch_today_events_many(calendar_ids, tz_name)
+
+        local_date = now_in_timezone(tz_name).date().isoformat()
+        keys = [(calendar_id, tz_name, local_date) for calendar_id in calendar_ids]
+
+        def load(missing: list[SharedKey]) -> dict[SharedKey, CalendarOutcome]:
+            fetched = self._fetch_today_events_many([key[0] for key in missing], tz_name)
+            return {key: fetched[key[0]] for key in missing if key[0] in fetched}
+
+        outcomes = self._shared.get_or_load_many(keys, load)
+        return {key[0]: _as_calendar_outcome(outcome) for key, outcome in outcomes.items()}
+
+    def shared_cache_stats(self) -> dict[str, int | float]:
+        return self._shared.stats() if self._shared is not None else {}
+
+    def close(self) -> None:
+        if self._shared is not None:
+            self._shared.close()
+
+    def _fetch_today_events(self, calendar_id: str, tz_name: str) -> list[dict[str, Any]]:
+        if self.event_store is not None:
+            return self._get_today_events_synced(self.event_store, calendar_id, tz_name)
+
+        return list(self.iter_today_events(calendar_id=calendar_id, timezone_name=tz_name))
+
+    def iter_today_events(
+        self,
+        *,
+        calendar_id: str,
+        timezone_name: str | None = None,
+        page_token: str | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        # nextPageToken を辿りながら1ページずつ取得・正規化する。共有キャッシュは通らない。
         tz_name = timezone_name or self.default_timezone
         time_min, time_max = today_bounds_rfc3339(tz_name)
+        try:
+            service = self._build_service()
+        except Exception as exc:
+            raise CalendarServiceError("Google Calendarの認証または取得処理に失敗しました。") from exc
 
+        while True:
+            try:
+                result = self._events_list_request(
+                    service, calendar_id, tz_name, time_min, time_max, page_token=page_token
+                ).execute()
+            except HttpError as exc:
+                raise CalendarServiceError("Google Calendar APIの呼び出しに失敗しました。") from exc
+            except Exception as exc:
+                raise CalendarServiceError("Google Calendarの認証または取得処理に失敗しました。") from exc
+
+            for item in result.get("items", []):
+                yield self._normalize_event(item, tz_name)
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _fetch_today_events_many(self, calendar_ids: list[str], tz_name: str) -> dict[str, CalendarOutcome]:
+        # 複数カレンダーを1回のバッチHTTPリクエストで取得する。
+        # 差分同期モードではほとんどがローカル参照なので、カレンダーごとに処理する。
+        if len(calendar_ids) <= 1 or self.event_store is not None:
+            return {
+                calendar_id: self._outcome(self._fetch_today_events, calendar_id, tz_name)
+                for calendar_id in calendar_ids
+            }
+
+        time_min, time_max = today_bounds_rfc3339(tz_name)
         try:
             service = self._build_service()
-            result = (
-                service.events()
-                .list(
-                    calendarId=calendar_id,
-                    timeMin=time_min,
-                    timeMax=time_max,
-                    singleEvents=True,
-                    orderBy="startTime",
-                    timeZone=tz_name,
+        except Exception as exc:
+            error = CalendarServiceError("Google Calendarの認証または取得処理に失敗しました。")
+            error.__cause__ = exc
+            return {calendar_id: error for calendar_id in calendar_ids}
+
+        outcomes: dict[str, CalendarOutcome] = {}
+        next_pages: dict[str, str] = {}
+        for offset in range(0, len(calendar_ids), self.BATCH_LIMIT):
+            chunk = calendar_ids[offset : offset + self.BATCH_LIMIT]
+
+            def on_response(request_id: str, response: dict[str, Any], exception: Exception | None) -> None:
+                calendar_id = chunk[int(request_id)]
+                if exception is not None:
+                    error = CalendarServiceError("Google Calendar APIの呼び出しに失敗しました。")
+                    error.__cause__ = exception
+                    outcomes[calendar_id] = error
+                    return
+                items = (response or {}).get("items", [])
+                outcomes[calendar_id] = [self._normalize_event(item, tz_name) for item in items]
+                if (response or {}).get("nextPageToken"):
+                    next_pages[calendar_id] = response["nextPageToken"]
+
+            batch = service.new_batch_http_request(callback=on_response)
+            for index, calendar_id in enumerate(chunk):
+                batch.add(
+                    self._events_list_request(service, calendar_id, tz_name, time_min, time_max),
+                    request_id=str(index),
                 )
-                .execute()
-            )
+            try:
+                batch.execute()
+            except Exception as exc:
+                error = CalendarServiceError("Google Calendar APIの呼び出しに失敗しました。")
+                error.__cause__ = exc
+                for calendar_id in chunk:
+                    outcomes.setdefault(calendar_id, error)
+
+        # 2ページ目以降があるカレンダーだけ個別に続きを取得する。
+        for calendar_id, page_token in next_pages.items():
+            first_page = outcomes[calendar_id]
+            if isinstance(first_page, CalendarServiceError):
+                continue
+            try:
+                first_page.extend(
+                    self.iter_today_events(calendar_id=calendar_id, timezone_name=tz_name, page_token=page_token)
+                )
+            except CalendarServiceError as exc:
+                outcomes[calendar_id] = exc
+        return outcomes
+
+    def _get_today_events_synced(
+        self,
+        store: "AsyncDatabase",
+        calendar_id: str,
+        tz_name: str,
+    ) -> list[dict[str, Any]]:
+        # 読み取りはこのスレッドから直接、書き込みは AsyncDatabase の単一ライター経由で行う。
+        try:
+            if not self._is_sync_fresh(store.sync.get_calendar_sync_state(calendar_id)):
+                with self._sync_lock(calendar_id):
+                    state = store.sync.get_calendar_sync_state(calendar_id)
+                    if not self._is_sync_fresh(state):
+                        self._sync_calendar(store, calendar_id, self._resume_token(state))
+        except CalendarServiceError:
+            raise
         except HttpError as exc:
             raise CalendarServiceError("Google Calendar APIの呼び出しに失敗しました。") from exc
         except Exception as exc:
             raise CalendarServiceError("Google Calendarの認証または取得処理に失敗しました。") from exc
 
-        items = result.get("items", [])
-        return [self._normalize_event(item, tz_name) for item in items]
+        time_min, time_max = today_bounds_rfc3339(tz_name)
+        rows = store.sync.list_calendar_events(
+            calendar_id,
+            day_start_utc=format_utc(parse_utc(time_min)),
+            day_end_utc=format_utc(parse_utc(time_max)),
+            local_date=now_in_timezone(tz_name).date().isoformat(),
+        )
+        return [
+            self._normalize_event(
+                {
+                    "summary": row["summary"],
+                    "start": json.loads(row["start_json"]),
+                    "end": json.loads(row["end_json"]),
+                },
+                tz_name,
+            )
+            for row in rows
+        ]
+
+    def _is_sync_fresh(self, state: tuple[str | None, str, str | None] | None) -> bool:
+        if self._resume_token(state) is None:
+            return False
+        age = datetime.now(timezone.utc) - parse_utc(state[1])
+        return age.total_seconds() < self.sync_max_age_sec
+
+    def _resume_token(self, state: tuple[str | None, str, str | None] | None) -> str | None:
+        # 差分同期を続けられるなら syncToken、フル同期が必要なら None。
+        if state is None or not state[0] or not state[2]:
+            return None
+        if datetime.now(timezone.utc) - parse_utc(state[2]) >= self.FULL_RESYNC_INTERVAL:
+            return None
+        return state[0]
+
+    def _sync_lock(self, calendar_id: str) -> threading.Lock:
+        with self._sync_locks_guard:
+            return self._sync_locks.setdefault(calendar_id, threading.Lock())
+
+    def _sync_calendar(self, store: "AsyncDatabase", calendar_id: str, sync_token: str | None) -> None:
+        service = self._build_service()
+        try:
+            upserts, deleted, next_token = self._fetch_changes(service, calendar_id, sync_token)
+        except HttpError as exc:
+            if sync_token is None or getattr(exc.resp, "status", None) != 410:
+                raise
+            # 410 Gone: syncToken が失効したのでフル同期からやり直す。
+            logger.info("Calendar sync token expired calendar=%s; running full sync", calendar_id)
+            sync_token = None
+            upserts, deleted, next_token = self._fetch_changes(service, calendar_id, None)
+
+        store.apply_calendar_changes_blocking(
+            calendar_id,
+            upserts=upserts,
+            deleted_event_ids=deleted,
+            sync_token=next_token,
+            full=sync_token is None,
+            prune_before=datetime.now(timezone.utc) - self.FULL_SYNC_LOOKBACK,
+        )
+
+    def _fetch_changes(
+        self,
+        service,
+        calendar_id: str,
+        sync_token: str | None,
+    ) -> tuple[list[dict[str, Any]], list[str], str | None]:
+        params: dict[str, Any] = {
+            "calendarId": calendar_id,
+            "singleEvents": True,
+            "maxResults": self.PAGE_SIZE,
+            "fields": self.SYNC_FIELDS,
+        }
+        if sync_token:
+            params["syncToken"] = sync_token
+        else:
+            now = datetime.now(timezone.utc)
+            params["timeMin"] = format_utc(now - self.FULL_SYNC_LOOKBACK)
+            params["timeMax"] = format_utc(now + self.FULL_SYNC_HORIZON)
+
+        upserts: list[dict[str, Any]] = []
+        deleted: list[str] = []
+        page_token: str | None = None
+        while True:
+            if page_token:
+                params["pageToken"] = page_token
+            result = service.events().list(**params).execute()
+            for item in result.get("items", []):
+                if item.get("status") == "cancelled":
+                    deleted.append(item["id"])
+                    continue
+                row = _event_store_row(item)
+                if row is not None:
+                    upserts.append(row)
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return upserts, deleted, result.get("nextSyncToken")
+
+    def _events_list_request(
+        self,
+        service,
+        calendar_id: str,
+        tz_name: str,
+        time_min: str,
+        time_max: str,
+        *,
+        page_token: str | None = None,
+    ):
+        params: dict[str, Any] = {
+            "calendarId": calendar_id,
+            "timeMin": time_min,
+            "timeMax": time_max,
+            "singleEvents": True,
+            "orderBy": "startTime",
+            "timeZone": tz_name,
+            "maxResults": self.PAGE_SIZE,
+            "fields": self.EVENT_FIELDS,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        return service.events().list(**params)
+
+    @staticmethod
+    def _outcome(func, *args: Any) -> CalendarOutcome:
+        try:
+            return func(*args)
+        except CalendarServiceError as exc:
+            return exc
 
     def _build_service(self):
         credentials = self._get_credentials()
-        return build("calendar", "v3", credentials=credentials, cache_discovery=False)
+        service = getattr(self._local, "service", None)
+        if service is not None and getattr(self._local, "credentials", None) is credentials:
+            return service
+
+        client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+        service = build(
+            "calendar",
+            "v3",
+            credentials=credentials,
+            cache_discovery=False,
+            client_options=client_options,
+        )
+        self._local.service = service
+        self._local.credentials = credentials
+        return service
 
     def _get_credentials(self) -> Credentials:
+        creds = self._credentials
+        if creds is not None and creds.valid:
+            return creds
+
+        # 期限切れ時のリフレッシュと token.json の書き込みは1スレッドだけが行う。
+        with self._credentials_lock:
+            creds = self._credentials
+            if creds is not None and creds.valid:
+                return creds
+            creds = self._load_credentials(creds)
+            self._credentials = creds
+            return creds
+
+    def _load_credentials(self, cached: Credentials | None) -> Credentials:
         if not self.client_secret_file.exists() and not self.token_file.exists():
             raise CalendarServiceError(
                 "credentials.json / token.json が見つかりません。Google Calendar連携の設定を確認してください。"
             )
 
-        creds: Credentials | None = None
-        if self.token_file.exists():
+        creds = cached
+        if creds is None and self.token_file.exists():
             creds = Credentials.from_authorized_user_file(str(self.token_file), self.SCOPES)
 
         if creds and creds.valid:
             return creds
 
         if creds and creds.expired and creds.refresh_token:
+            logger.info("Refreshing Google Calendar access token")
             creds.refresh(Request())
             self.token_file.parent.mkdir(parents=True, exist_ok=True)
             self.token_file.write_text(creds.to_json(), encoding="utf-8")
@@ -114,3 +455,38 @@ class CalendarService:
             "summary": summary,
             "all_day": False,
         }
+
+
+def _as_calendar_outcome(outcome: list[dict[str, Any]] | Exception) -> CalendarOutcome:
+    if isinstance(outcome, Exception) and not isinstance(outcome, CalendarServiceError):
+        error = CalendarServiceError("Google Calendarの認証または取得処理に失敗しました。")
+        error.__cause__ = outcome
+        return error
+    return outcome
+
+
+def _event_store_row(item: dict[str, Any]) -> dict[str, Any] | None:
+    start_info = item.get("start") or {}
+    end_info = item.get("end") or {}
+    row: dict[str, Any] = {
+        "event_id": item["id"],
+        "summary": item.get("summary"),
+        "start_json": json.dumps(start_info, ensure_ascii=False),
+        "end_json": json.dumps(end_info, ensure_ascii=False),
+        "start_utc": None,
+        "end_utc": None,
+        "start_date": None,
+        "end_date": None,
+    }
+    if start_info.get("date"):
+        row["all_day"] = 1
+        row["start_date"] = start_info["date"]
+        row["end_date"] = end_info.get("date") or (date.fromisoformat(start_info["date"]) + timedelta(days=1)).isoformat()
+        return row
+
+    if not start_info.get("dateTime"):
+        return None
+    row["all_day"] = 0
+    row["start_utc"] = format_utc(parse_utc(start_info["dateTime"]))
+    row["end_utc"] = format_utc(parse_utc(end_info["dateTime"])) if end_info.get("dateTime") else row["start_utc"]
+    return row
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 from dataclasses import dataclass, field
-from typing import Any, Literal
+from typing import Any, Awaitable, Callable, Literal
 
 from src.db import UserSettings
 from src.services.calendar_service import CalendarService, CalendarServiceError
-from src.services.weather_service import WeatherService, WeatherServiceError
+from src.services.weather_service import WeatherOutcome, WeatherService, WeatherServiceError
 
-Status = Literal["ok", "missing", "error"]
+logger = logging.getLogger(__name__)
+
+Status = Literal["ok", "missing", "error", "pending"]
 
 
 @dataclass(slots=True)
@@ -21,58 +24,217 @@ class DailySummaryResult:
     weather_error: str | None = None
 
 
+ProgressCallback = Callable[[DailySummaryResult], Awaitable[None]]
+
+
 class DailySummaryService:
-    def __init__(self, *, calendar_service: CalendarService, weather_service: WeatherService):
+    def __init__(
+        self,
+        *,
+        calendar_service: CalendarService,
+        weather_service: WeatherService,
+        calendar_timeout_sec: float = 10.0,
+        weather_timeout_sec: float = 10.0,
+        summary_timeout_sec: float = 12.0,
+    ):
         self.calendar_service = calendar_service
         self.weather_service = weather_service
+        self.calendar_timeout_sec = calendar_timeout_sec
+        self.weather_timeout_sec = weather_timeout_sec
+        self.summary_timeout_sec = summary_timeout_sec
 
-    async def build_summary_async(self, settings: UserSettings) -> DailySummaryResult:
-        return await asyncio.to_thread(self.build_summary, settings)
+    def cache_stats(self) -> dict[str, dict[str, int | float]]:
+        return {
+            "calendar": self.calendar_service.shared_cache_stats(),
+            "weather": self.weather_service.cache_stats(),
+        }
 
-    def build_summary(self, settings: UserSettings) -> DailySummaryResult:
-        result = DailySummaryResult()
+    async def build_summary_async(
+        self,
+        settings: UserSettings,
+        *,
+        weather: WeatherOutcome | None = None,
+        on_progress: ProgressCallback | None = None,
+    ) -> DailySummaryResult:
+        # カレンダー（複数でも1回のバッチ）と天気を並行に取得し、全体の締め切りまでに揃った分で組み立てる。
+        # weather を渡された場合（一括取得済み）は天気の取得を省く。
         tz_name = settings.timezone or "Asia/Tokyo"
+        loop = asyncio.get_running_loop()
 
+        tasks: dict[asyncio.Future[Any], list[str] | None] = {}
         calendar_ids = settings.calendar_ids
         if calendar_ids:
-            calendar_errors: list[str] = []
-            aggregated_events: list[dict[str, Any]] = []
-            for calendar_id in calendar_ids:
+            task = asyncio.create_task(
+                _with_deadline(
+                    self.calendar_timeout_sec,
+                    self.calendar_service.get_today_events_many,
+                    calendar_ids,
+                    timezone_name=tz_name,
+                )
+            )
+            tasks[task] = calendar_ids
+        if weather is not None:
+            resolved: asyncio.Future[Any] = loop.create_future()
+            if isinstance(weather, Exception):
+                resolved.set_exception(weather)
+            else:
+                resolved.set_result(weather)
+            tasks[resolved] = None
+        elif settings.latitude is not None and settings.longitude is not None:
+            task = asyncio.create_task(
+                asyncio.wait_for(
+                    self.weather_service.get_today_weather_async(
+                        latitude=settings.latitude,
+                        longitude=settings.longitude,
+                        timezone_name=tz_name,
+                    ),
+                    timeout=self.weather_timeout_sec,
+                )
+            )
+            tasks[task] = None
+        if not tasks:
+            return DailySummaryResult()
+
+        deadline = loop.time() + self.summary_timeout_sec
+        outcomes: dict[asyncio.Future[Any], Any] = {}
+        pending = set(tasks)
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                outcomes[task] = _task_outcome(task)
+            if done and pending and on_progress is not None:
                 try:
-                    aggregated_events.extend(
-                        self.calendar_service.get_today_events(
-                            calendar_id=calendar_id,
-                            timezone_name=tz_name,
-                        )
-                    )
-                except CalendarServiceError as exc:
-                    calendar_errors.append(f"{calendar_id}: {exc}")
-
-            if aggregated_events:
-                result.events = sorted(aggregated_events, key=_event_sort_key)
-                result.calendar_status = "ok"
-                if calendar_errors:
-                    result.calendar_error = " / ".join(calendar_errors)
-            elif not calendar_errors:
-                # 取得成功・予定0件のケースは「未設定」ではなく「予定なし」として扱う。
-                result.calendar_status = "ok"
-            elif calendar_errors:
-                result.calendar_status = "error"
-                result.calendar_error = " / ".join(calendar_errors)
-
-        if settings.latitude is not None and settings.longitude is not None:
+                    await on_progress(_assemble_summary(tasks, outcomes, final=False))
+                except Exception:
+                    logger.exception("Summary progress callback failed user=%s", settings.discord_user_id)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.info(
+                "Summary deadline reached user=%s pending=%d/%d",
+                settings.discord_user_id,
+                len(pending),
+                len(tasks),
+            )
+        return _assemble_summary(tasks, outcomes, final=True)
+
+    async def fetch_weather_many(self, users: list[UserSettings]) -> dict[str, WeatherOutcome]:
+        # 同じ分に送るユーザーの天気をタイムゾーンごとの一括リクエストで取得する。
+        groups: dict[str, list[UserSettings]] = {}
+        for settings in users:
+            if settings.latitude is not None and settings.longitude is not None:
+                groups.setdefault(settings.timezone or "Asia/Tokyo", []).append(settings)
+
+        async def fetch(tz_name: str, group: list[UserSettings]) -> dict[str, WeatherOutcome]:
+            points = [(settings.latitude, settings.longitude) for settings in group]
             try:
-                result.weather = self.weather_service.get_today_weather(
-                    latitude=settings.latitude,
-                    longitude=settings.longitude,
-                    timezone_name=tz_name,
+                outcomes = await asyncio.wait_for(
+                    self.weather_service.get_today_weather_many_async(points, tz_name),
+                    timeout=self.weather_timeout_sec,
                 )
-                result.weather_status = "ok"
-            except WeatherServiceError as exc:
-                result.weather_status = "error"
-                result.weather_error = str(exc)
+            except Exception as exc:
+                error = _as_service_error(exc, WeatherServiceError, "天気の取得")
+                outcomes = {point: error for point in points}
+            return {
+                settings.discord_user_id: outcomes[(settings.latitude, settings.longitude)] for settings in group
+            }
+
+        results: dict[str, WeatherOutcome] = {}
+        for outcome in await asyncio.gather(*(fetch(tz_name, group) for tz_name, group in groups.items())):
+            results.update(outcome)
+        return results
+
+
+def _assemble_summary(
+    tasks: dict[asyncio.Future[Any], list[str] | None],
+    outcomes: dict[asyncio.Future[Any], Any],
+    *,
+    final: bool,
+) -> DailySummaryResult:
+    # final=False のときは未完了のソースを "pending" として途中経過を組み立てる。
+    result = DailySummaryResult()
+    for task, calendar_ids in tasks.items():
+        if task in outcomes:
+            outcome = outcomes[task]
+        elif final:
+            outcome = asyncio.TimeoutError()
+        else:
+            if calendar_ids is None:
+                result.weather_status = "pending"
+            else:
+                result.calendar_status = "pending"
+            continue
+
+        if calendar_ids is not None:
+            # バッチ全体の失敗（タイムアウト等）は全カレンダーの失敗として扱う。
+            if isinstance(outcome, BaseException):
+                error = _as_service_error(outcome, CalendarServiceError, "予定の取得")
+                calendar_outcomes = {calendar_id: error for calendar_id in calendar_ids}
+            else:
+                calendar_outcomes = outcome
+            _apply_calendar_outcomes(result, calendar_ids, calendar_outcomes)
+            continue
+        outcome = _as_service_error(outcome, WeatherServiceError, "天気の取得")
+        if isinstance(outcome, WeatherServiceError):
+            result.weather_status = "error"
+            result.weather_error = str(outcome)
+        else:
+            result.weather = outcome
+            result.weather_status = "ok"
+    return result
+
+
+def _apply_calendar_outcomes(
+    result: DailySummaryResult,
+    calendar_ids: list[str],
+    outcomes: dict[str, Any],
+) -> None:
+    calendar_errors: list[str] = []
+    aggregated_events: list[dict[str, Any]] = []
+    for calendar_id in calendar_ids:
+        outcome = outcomes.get(calendar_id)
+        if isinstance(outcome, CalendarServiceError):
+            calendar_errors.append(f"{calendar_id}: {outcome}")
+        elif outcome:
+            aggregated_events.extend(outcome)
+
+    if aggregated_events:
+        result.events = sorted(aggregated_events, key=_event_sort_key)
+        result.calendar_status = "ok"
+        if calendar_errors:
+            result.calendar_error = " / ".join(calendar_errors)
+    elif not calendar_errors:
+        # 取得成功・予定0件のケースは「未設定」ではなく「予定なし」として扱う。
+        result.calendar_status = "ok"
+    else:
+        result.calendar_status = "error"
+        result.calendar_error = " / ".join(calendar_errors)
+
+
+async def _with_deadline(timeout_sec: float, func, /, *args: Any, **kwargs: Any) -> Any:
+    # スレッド側の処理は打ち切れないが、待つのはここまで。結果は共有キャッシュに残る。
+    return await asyncio.wait_for(asyncio.to_thread(func, *args, **kwargs), timeout=timeout_sec)
+
+
+def _task_outcome(task: asyncio.Future[Any]) -> Any:
+    if task.cancelled():
+        return asyncio.TimeoutError()
+    return task.exception() or task.result()
+
 
-        return result
+def _as_service_error(outcome: Any, error_type: type[Exception], label: str) -> Any:
+    if isinstance(outcome, error_type):
+        return outcome
+    if isinstance(outcome, asyncio.TimeoutError):
+        return error_type(f"{label}がタイムアウトしました。")
+    if isinstance(outcome, BaseException):
+        logger.error("Summary source failed unexpectedly (%s)", error_type.__name__, exc_info=outcome)
+        return error_type(f"{label}中に予期しないエラーが発生しました。")
+    return outcome
 
 
 def _event_sort_key(event: dict[str, Any]) -> tuple[int, str, str]:
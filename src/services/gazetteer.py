@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.utils.validators import normalize_place_query
+
+DEFAULT_GAZETTEER_PATH = Path(__file__).resolve().parents[2] / "data" / "gazetteer" / "places.tsv"
+
+EARTH_RADIUS_KM = 6371.0
+
+# カタカナ→ひらがな（ヴ・ヵ・ヶ を含む）。長音符はそのまま残す。
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+
+@dataclass(slots=True, frozen=True)
+class Place:
+    name: str
+    kana: str
+    romaji: str
+    admin: str
+    latitude: float
+    longitude: float
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} / {self.admin}" if self.admin and self.admin != self.name else self.name
+
+
+class Gazetteer:
+    # 同梱の地名辞書。漢字・かな・ローマ字の前方一致索引と逆ジオコーディング用の KD 木を持つ。
+    # 初回利用時に読み込み、以後は読み取り専用なのでスレッド間で共有してよい。
+
+    def __init__(self, path: Path = DEFAULT_GAZETTEER_PATH):
+        self.path = path
+        self._places: list[Place] = []
+        self._keys: list[str] = []
+        self._key_places: list[int] = []
+        self._by_label: dict[str, Place] = {}
+        self._tree: _KDTree | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._places)
+
+    def suggest(self, query: str, *, limit: int = 25) -> list[Place]:
+        prefix = normalize_gazetteer_key(query)
+        if not prefix:
+            return []
+        self._ensure_loaded()
+
+        seen: set[int] = set()
+        matches: list[Place] = []
+        index = bisect.bisect_left(self._keys, prefix)
+        while index < len(self._keys) and self._keys[index].startswith(prefix):
+            place_index = self._key_places[index]
+            if place_index not in seen:
+                seen.add(place_index)
+                matches.append(self._places[place_index])
+                if len(matches) >= limit:
+                    break
+            index += 1
+        return matches
+
+    def resolve(self, label: str) -> Place | None:
+        # 補完候補の value（label）をそのまま受け取り、API を介さずに座標を引く。
+        self._ensure_loaded()
+        return self._by_label.get(normalize_gazetteer_key(label))
+
+    def nearest(self, latitude: float, longitude: float) -> tuple[Place, float] | None:
+        # (最寄りの地点, 大円距離 km)
+        self._ensure_loaded()
+        if self._tree is None:
+            return None
+        place_index, chord = self._tree.nearest(_to_unit_vector(latitude, longitude))
+        distance_km = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+        return self._places[place_index], distance_km
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._load()
+            self._loaded = True
+
+    def _load(self) -> None:
+        places: list[Place] = []
+        entries: list[tuple[str, int]] = []
+        with self.path.open(encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, kana, romaji, admin, latitude, longitude = line.rstrip("\n").split("\t")
+                place = Place(name, kana, romaji, admin, float(latitude), float(longitude))
+                place_index = len(places)
+                places.append(place)
+                for alias in {normalize_gazetteer_key(value) for value in (name, kana, romaji)}:
+                    if alias:
+                        entries.append((alias, place_index))
+
+        entries.sort()
+        self._places = places
+        self._keys = [key for key, _ in entries]
+        self._key_places = [place_index for _, place_index in entries]
+        self._by_label = {normalize_gazetteer_key(place.label): place for place in places}
+        self._tree = (
+            _KDTree([_to_unit_vector(place.latitude, place.longitude) for place in places]) if places else None
+        )
+
+
+class _KDTree:
+    # 単位球面上の3次元座標で組むので、直線距離が近いほど大円距離も近い（日付変更線・極も扱える）。
+    def __init__(self, points: list[tuple[float, float, float]]):
+        self._points = points
+        self._node_point: list[int] = []
+        self._node_axis: list[int] = []
+        self._left: list[int] = []
+        self._right: list[int] = []
+        self._root = self._build(list(range(len(points))), 0)
+
+    def nearest(self, target: tuple[float, float, float]) -> tuple[int, float]:
+        # (点のインデックス, 直線距離)
+        best_index = -1
+        best_sq = math.inf
+        stack: list[tuple[int, float]] = [(self._root, 0.0)]
+        while stack:
+            node, bound_sq = stack.pop()
+            if node < 0 or bound_sq >= best_sq:
+                continue
+            point_index = self._node_point[node]
+            point = self._points[point_index]
+            dist_sq = (
+                (target[0] - point[0]) ** 2 + (target[1] - point[1]) ** 2 + (target[2] - point[2]) ** 2
+            )
+            if dist_sq < best_sq:
+                best_index, best_sq = point_index, dist_sq
+            diff = target[self._node_axis[node]] - point[self._node_axis[node]]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            stack.append((far, diff * diff))
+            stack.append((near, 0.0))
+        return best_index, math.sqrt(best_sq)
+
+    def _build(self, indices: list[int], depth: int) -> int:
+        if not indices:
+            return -1
+        axis = depth % 3
+        indices.sort(key=lambda index: self._points[index][axis])
+        mid = len(indices) // 2
+        node = len(self._node_point)
+        self._node_point.append(indices[mid])
+        self._node_axis.append(axis)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._left[node] = self._build(indices[:mid], depth + 1)
+        self._right[node] = self._build(indices[mid + 1 :], depth + 1)
+        return node
+
+
+def _to_unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def normalize_gazetteer_key(value: str) -> str:
+    return normalize_place_query(value).translate(_KATAKANA_TO_HIRAGANA)
@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
 
+import aiohttp
 import requests
 
+from src.services.gazetteer import Gazetteer, Place
+from src.utils.http_client import AsyncHttpClient, HttpSessionPool
+from src.utils.validators import looks_like_coordinate_input, normalize_place_query
+
+if TYPE_CHECKING:
+    from src.async_db import AsyncDatabase
+    from src.db import Database
+
 
 class GeocodingServiceError(RuntimeError):
     pass
@@ -19,26 +31,119 @@ class GeocodingResult:
 class GeocodingService:
     BASE_URL = "https://geocoding-api.open-meteo.com/v1/search"
 
-    def __init__(self, timeout_sec: float = 10.0):
+    def __init__(
+        self,
+        timeout_sec: float = 10.0,
+        *,
+        http: HttpSessionPool | None = None,
+        async_http: AsyncHttpClient | None = None,
+        cache_store: "AsyncDatabase | None" = None,
+        cache_ttl_sec: float = 30 * 86400,
+        negative_ttl_sec: float = 86400,
+        gazetteer: Gazetteer | None = None,
+        reverse_max_km: float = 30.0,
+    ):
         self.timeout_sec = timeout_sec
+        self.http = http or HttpSessionPool()
+        self.async_http = async_http or AsyncHttpClient()
+        self.cache_store = cache_store
+        self.cache_ttl = timedelta(seconds=max(0.0, cache_ttl_sec))
+        self.negative_ttl = timedelta(seconds=max(0.0, negative_ttl_sec))
+        self.gazetteer = gazetteer or Gazetteer()
+        self.reverse_max_km = reverse_max_km
+
+    def suggest_places(self, query: str, *, limit: int = 25) -> list[GeocodingResult]:
+        return [_from_place(place) for place in self.gazetteer.suggest(query, limit=limit)]
+
+    def resolve_local(self, text: str) -> GeocodingResult | None:
+        place = self.gazetteer.resolve(text)
+        return _from_place(place) if place is not None else None
+
+    def reverse_label(self, latitude: float, longitude: float) -> str | None:
+        # 座標入力に対して最寄りの地名を付ける。遠すぎる場合は誤解を避けて付けない。
+        nearest = self.gazetteer.nearest(latitude, longitude)
+        if nearest is None:
+            return None
+        place, distance_km = nearest
+        if distance_km > self.reverse_max_km:
+            return None
+        return f"{place.label} 付近"
+
+    def backfill_location_names(self, store: "Database") -> int:
+        # 座標のまま保存されている location_name を、最寄りの地名ラベルにまとめて置き換える。
+        updates: list[tuple[str, str]] = []
+        for discord_user_id, location_name, latitude, longitude in store.list_user_locations():
+            if location_name and not looks_like_coordinate_input(location_name):
+                continue
+            label = self.reverse_label(latitude, longitude)
+            if label is not None:
+                updates.append((discord_user_id, label))
+        return store.set_location_names(updates) if updates else 0
 
     def geocode(self, query: str) -> GeocodingResult | None:
+        # 同期版はワーカースレッドから呼ぶ。キャッシュへの書き込みは単一ライター経由で行う。
+        key = normalize_place_query(query)
+        if self.cache_store is not None:
+            cached = self.cache_store.sync.get_cached_geocode(key)
+            if cached is not None:
+                return _from_cached(cached)
+
         try:
-            response = requests.get(
-                self.BASE_URL,
-                params={
-                    "name": query,
-                    "count": 1,
-                    "language": "ja",
-                    "format": "json",
-                },
-                timeout=self.timeout_sec,
-            )
+            response = self.http.get(self.BASE_URL, params=self._params(query), timeout=self.timeout_sec)
             response.raise_for_status()
             payload = response.json()
         except requests.RequestException as exc:
             raise GeocodingServiceError("Open-Meteo Geocoding APIの呼び出しに失敗しました。") from exc
 
+        result = self._parse_result(payload)
+        if self.cache_store is not None:
+            self.cache_store.put_cached_geocode_blocking(key, **self._cache_row(result))
+        return result
+
+    async def fetch_async(self, query: str) -> GeocodingResult | None:
+        # キャッシュを見ずに API に問い合わせ、結果（見つからなかった場合も含む）をキャッシュに書く。
+        try:
+            payload = await self.async_http.get_json(
+                self.BASE_URL,
+                params=self._params(query),
+                timeout_sec=self.timeout_sec,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+            raise GeocodingServiceError("Open-Meteo Geocoding APIの呼び出しに失敗しました。") from exc
+
+        result = self._parse_result(payload)
+        if self.cache_store is not None:
+            await self.cache_store.put_cached_geocode(normalize_place_query(query), **self._cache_row(result))
+        return result
+
+    async def lookup_cached_async(self, query: str) -> tuple[bool, GeocodingResult | None]:
+        # (キャッシュに有るか, 結果)。「見つからなかった」も有効期限内はヒットとして返す。
+        if self.cache_store is None:
+            return False, None
+        cached = await self.cache_store.get_cached_geocode(normalize_place_query(query))
+        if cached is None:
+            return False, None
+        return True, _from_cached(cached)
+
+    def _cache_row(self, result: GeocodingResult | None) -> dict[str, Any]:
+        if result is None:
+            return {"location_name": None, "latitude": None, "longitude": None, "ttl": self.negative_ttl}
+        return {
+            "location_name": result.location_name,
+            "latitude": result.latitude,
+            "longitude": result.longitude,
+            "ttl": self.cache_ttl,
+        }
+
+    def _params(self, query: str) -> dict[str, str | int]:
+        return {
+            "name": query,
+            "count": 1,
+            "language": "ja",
+            "format": "json",
+        }
+
+    def _parse_result(self, payload: dict) -> GeocodingResult | None:
         results = payload.get("results") or []
         if not results:
             return None
@@ -56,3 +161,14 @@ class GeocodingService:
             if value and value not in parts:
                 parts.append(str(value))
         return " / ".join(parts) if parts else "不明な地点"
+
+
+def _from_place(place: Place) -> GeocodingResult:
+    return GeocodingResult(location_name=place.label, latitude=place.latitude, longitude=place.longitude)
+
+
+def _from_cached(cached: tuple[str | None, float | None, float | None]) -> GeocodingResult | None:
+    location_name, latitude, longitude = cached
+    if latitude is None or longitude is None:
+        return None
+    return GeocodingResult(location_name=location_name or "不明な地点", latitude=latitude, longitude=longitude)
@@ -1,58 +1,256 @@
 from __future__ import annotations
 
+import asyncio
+import math
+import time
 from typing import Any
 
+import aiohttp
 import requests
 
+from src.utils.http_client import AsyncHttpClient, HttpSessionPool
+from src.utils.shared_fetch import SharedFetchCache
+from src.utils.time_utils import now_in_timezone
 from src.utils.weather_code_map import weather_code_to_japanese
 
+# (格子の緯度インデックス, 経度インデックス, タイムゾーン, 現地日付)
+GridKey = tuple[int, int, str, str]
+Point = tuple[float, float]
+
 
 class WeatherServiceError(RuntimeError):
     pass
 
 
+WeatherOutcome = dict[str, Any] | WeatherServiceError
+
+
 class WeatherService:
     BASE_URL = "https://api.open-meteo.com/v1/forecast"
+    # 1リクエストにまとめる地点数の上限（URL長と応答サイズを抑える）。
+    BATCH_LIMIT = 100
 
-    def __init__(self, timeout_sec: float = 10.0):
+    def __init__(
+        self,
+        timeout_sec: float = 10.0,
+        *,
+        cache_grid_deg: float = 0.05,
+        cache_refresh_sec: float = 3600.0,
+        cache_stale_sec: float = 600.0,
+        http: HttpSessionPool | None = None,
+        async_http: AsyncHttpClient | None = None,
+    ):
         self.timeout_sec = timeout_sec
+        self.http = http or HttpSessionPool()
+        self.async_http = async_http or AsyncHttpClient()
+        self.cache_grid_deg = max(0.0, cache_grid_deg)
+        self.cache_refresh_sec = max(0.0, cache_refresh_sec)
+        # 予報の更新境界（既定は毎正時）に揃えて失効させ、近隣ユーザーで1件を共有する。
+        self._cache: SharedFetchCache[GridKey, dict[str, Any]] | None = (
+            SharedFetchCache(
+                ttl_sec=self.cache_refresh_sec,
+                stale_sec=cache_stale_sec,
+                ttl_for=self._ttl_until_next_update,
+            )
+            if self.cache_refresh_sec > 0 and self.cache_grid_deg > 0
+            else None
+        )
 
     def get_today_weather(self, *, latitude: float, longitude: float, timezone_name: str) -> dict[str, Any]:
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "current": "temperature_2m,weather_code",
-            "daily": "weather_code,temperature_2m_max,temperature_2m_min,precipitation_probability_max",
-            "timezone": timezone_name,
-        }
+        if self._cache is None:
+            return self._fetch_today_weather(latitude, longitude, timezone_name)
+
+        key = self._grid_key(latitude, longitude, timezone_name)
+        return self._cache.get_or_load(key, lambda: self._fetch_today_weather(*self._cell_center(key), key[2]))
+
+    async def get_today_weather_async(
+        self,
+        *,
+        latitude: float,
+        longitude: float,
+        timezone_name: str,
+    ) -> dict[str, Any]:
+        outcome = (await self.get_today_weather_many_async([(latitude, longitude)], timezone_name))[
+            (latitude, longitude)
+        ]
+        if isinstance(outcome, WeatherServiceError):
+            raise outcome
+        return outcome
+
+    async def get_today_weather_many_async(
+        self,
+        points: list[Point],
+        timezone_name: str,
+    ) -> dict[Point, WeatherOutcome]:
+        unique_points = list(dict.fromkeys(points))
+        if self._cache is None:
+            outcomes = await self._fetch_today_weather_many_async(unique_points, timezone_name)
+            return dict(zip(unique_points, outcomes))
+
+        keys = {point: self._grid_key(point[0], point[1], timezone_name) for point in unique_points}
+
+        async def load(missing: list[GridKey]) -> dict[GridKey, WeatherOutcome]:
+            fetched = await self._fetch_today_weather_many_async(
+                [self._cell_center(key) for key in missing],
+                timezone_name,
+            )
+            return dict(zip(missing, fetched))
+
+        outcomes = await self._cache.get_or_load_many_async(list(keys.values()), load)
+        return {point: _as_weather_outcome(outcomes[key]) for point, key in keys.items()}
+
+    def cache_stats(self) -> dict[str, int | float]:
+        return self._cache.stats() if self._cache is not None else {}
+
+    def close(self) -> None:
+        if self._cache is not None:
+            self._cache.close()
+
+    def _grid_key(self, latitude: float, longitude: float, timezone_name: str) -> GridKey:
+        local_date = now_in_timezone(timezone_name).date().isoformat()
+        return (
+            math.floor(latitude / self.cache_grid_deg),
+            math.floor(longitude / self.cache_grid_deg),
+            timezone_name,
+            local_date,
+        )
+
+    def _cell_center(self, key: GridKey) -> tuple[float, float]:
+        # 同じセルのユーザーには同じ地点の予報を返す。
+        return (
+            round((key[0] + 0.5) * self.cache_grid_deg, 4),
+            round((key[1] + 0.5) * self.cache_grid_deg, 4),
+        )
+
+    def _ttl_until_next_update(self, key: GridKey, value: dict[str, Any]) -> float:
+        now = time.time()
+        return self.cache_refresh_sec - (now % self.cache_refresh_sec)
+
+    def _fetch_today_weather(self, latitude: float, longitude: float, timezone_name: str) -> dict[str, Any]:
+        outcome = self._fetch_today_weather_many([(latitude, longitude)], timezone_name)[0]
+        if isinstance(outcome, WeatherServiceError):
+            raise outcome
+        return outcome
+
+    def _fetch_today_weather_many(
+        self,
+        points: list[Point],
+        timezone_name: str,
+    ) -> list[WeatherOutcome]:
+        outcomes: list[WeatherOutcome] = []
+        for chunk in _chunks(points, self.BATCH_LIMIT):
+            try:
+                payloads = self._request_forecast(chunk, timezone_name)
+            except WeatherServiceError as exc:
+                outcomes.extend(exc for _ in chunk)
+                continue
+            outcomes.extend(_parse_forecasts(chunk, payloads, timezone_name))
+        return outcomes
+
+    async def _fetch_today_weather_many_async(
+        self,
+        points: list[Point],
+        timezone_name: str,
+    ) -> list[WeatherOutcome]:
+        async def fetch(chunk: list[Point]) -> list[WeatherOutcome]:
+            try:
+                payloads = await self._request_forecast_async(chunk, timezone_name)
+            except WeatherServiceError as exc:
+                return [exc for _ in chunk]
+            return _parse_forecasts(chunk, payloads, timezone_name)
 
+        chunks = await asyncio.gather(*(fetch(chunk) for chunk in _chunks(points, self.BATCH_LIMIT)))
+        return [outcome for chunk in chunks for outcome in chunk]
+
+    def _request_forecast(self, points: list[Point], timezone_name: str) -> list[dict[str, Any]]:
         try:
-            response = requests.get(self.BASE_URL, params=params, timeout=self.timeout_sec)
+            response = self.http.get(
+                self.BASE_URL,
+                params=_forecast_params(points, timezone_name),
+                timeout=self.timeout_sec,
+            )
             response.raise_for_status()
             payload = response.json()
         except requests.RequestException as exc:
             raise WeatherServiceError("Open-Meteo Forecast APIの呼び出しに失敗しました。") from exc
+        except ValueError as exc:
+            raise WeatherServiceError("Open-Meteo Forecast APIの応答を解析できませんでした。") from exc
+        return _split_payloads(payload, len(points))
+
+    async def _request_forecast_async(self, points: list[Point], timezone_name: str) -> list[dict[str, Any]]:
+        try:
+            payload = await self.async_http.get_json(
+                self.BASE_URL,
+                params=_forecast_params(points, timezone_name),
+                timeout_sec=self.timeout_sec,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise WeatherServiceError("Open-Meteo Forecast APIの呼び出しに失敗しました。") from exc
+        except ValueError as exc:
+            raise WeatherServiceError("Open-Meteo Forecast APIの応答を解析できませんでした。") from exc
+        return _split_payloads(payload, len(points))
+
+
+def _forecast_params(points: list[Point], timezone_name: str) -> dict[str, str]:
+    # 緯度経度をカンマ区切りで渡すと、地点ごとの結果が配列で返る（1地点ならオブジェクト）。
+    return {
+        "latitude": ",".join(str(latitude) for latitude, _ in points),
+        "longitude": ",".join(str(longitude) for _, longitude in points),
+        "current": "temperature_2m,weather_code",
+        "daily": "weather_code,temperature_2m_max,temperature_2m_min,precipitation_probability_max",
+        "timezone": timezone_name,
+    }
+
+
+def _split_payloads(payload: Any, count: int) -> list[dict[str, Any]]:
+    payloads = payload if isinstance(payload, list) else [payload]
+    if len(payloads) != count:
+        raise WeatherServiceError("Open-Meteo Forecast APIの応答件数が一致しません。")
+    return payloads
+
+
+def _parse_forecasts(
+    points: list[Point],
+    payloads: list[dict[str, Any]],
+    timezone_name: str,
+) -> list[WeatherOutcome]:
+    return [
+        _parse_forecast(payload, latitude, longitude, timezone_name)
+        for (latitude, longitude), payload in zip(points, payloads)
+    ]
+
+
+def _chunks(points: list[Point], size: int) -> list[list[Point]]:
+    return [points[offset : offset + size] for offset in range(0, len(points), size)]
+
+
+def _parse_forecast(payload: dict[str, Any], latitude: float, longitude: float, timezone_name: str) -> dict[str, Any]:
+    current = payload.get("current") or {}
+    daily = payload.get("daily") or {}
+    daily_weather_code = _first(daily.get("weather_code"))
+    effective_code = current.get("weather_code")
+    if effective_code is None:
+        effective_code = daily_weather_code
+
+    return {
+        "current_temperature": current.get("temperature_2m"),
+        "current_weather_code": current.get("weather_code"),
+        "weather_code": effective_code,
+        "weather_text": weather_code_to_japanese(effective_code),
+        "temperature_max": _first(daily.get("temperature_2m_max")),
+        "temperature_min": _first(daily.get("temperature_2m_min")),
+        "precipitation_probability_max": _first(daily.get("precipitation_probability_max")),
+        "daily_weather_code": daily_weather_code,
+        "latitude": payload.get("latitude", latitude),
+        "longitude": payload.get("longitude", longitude),
+        "timezone": payload.get("timezone", timezone_name),
+    }
+
 
-        current = payload.get("current") or {}
-        daily = payload.get("daily") or {}
-        daily_weather_code = _first(daily.get("weather_code"))
-        effective_code = current.get("weather_code")
-        if effective_code is None:
-            effective_code = daily_weather_code
-
-        return {
-            "current_temperature": current.get("temperature_2m"),
-            "current_weather_code": current.get("weather_code"),
-            "weather_code": effective_code,
-            "weather_text": weather_code_to_japanese(effective_code),
-            "temperature_max": _first(daily.get("temperature_2m_max")),
-            "temperature_min": _first(daily.get("temperature_2m_min")),
-            "precipitation_probability_max": _first(daily.get("precipitation_probability_max")),
-            "daily_weather_code": daily_weather_code,
-            "latitude": payload.get("latitude", latitude),
-            "longitude": payload.get("longitude", longitude),
-            "timezone": payload.get("timezone", timezone_name),
-        }
+def _as_weather_outcome(outcome: dict[str, Any] | Exception) -> WeatherOutcome:
+    if isinstance(outcome, WeatherServiceError) or not isinstance(outcome, Exception):
+        return outcome
+    return WeatherServiceError("天気の取得中に予期しないエラーが発生しました。")
 
 
 def _first(values: Any) -> Any:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 from src.db import UserSettings
@@ -7,6 +8,20 @@ from src.db import UserSettings
 if TYPE_CHECKING:
     from src.services.daily_summary_service import DailySummaryResult
 
+PENDING_LINE = "⏳ 取得中…"
+MORNING_GREETING = "☀️ おはようございます。今日の予定と天気です。"
+DISCORD_MESSAGE_LIMIT = 2000
+# 組み立て済みセクションを保持する数（天気・予定それぞれ）。
+SECTION_CACHE_SIZE = 4096
+
+_WEATHER_FIELDS = (
+    "weather_text",
+    "current_temperature",
+    "temperature_max",
+    "temperature_min",
+    "precipitation_probability_max",
+)
+
 
 def format_help_message() -> str:
     return "\n".join(
@@ -56,7 +71,7 @@ def format_daily_report(
     if mention_user:
         lines.append(f"<@{settings.discord_user_id}>")
     if morning_mode:
-        lines.append("☀️ おはようございます。今日の予定と天気です。")
+        lines.append(MORNING_GREETING)
 
     lines.extend(_format_weather_section(settings, summary))
     lines.append("")
@@ -65,65 +80,128 @@ def format_daily_report(
     return "\n".join(lines).strip()
 
 
-def _format_weather_section(settings: UserSettings, summary: "DailySummaryResult") -> list[str]:
-    if summary.weather_status == "missing":
-        return [
+def format_morning_digest(reports: list[str], *, limit: int = DISCORD_MESSAGE_LIMIT) -> list[str]:
+    # 同じチャンネル宛ての通知を挨拶1回＋ユーザーごとのブロックにまとめ、文字数上限で分割する。
+    if not reports:
+        return []
+    messages: list[str] = []
+    parts: list[str] = [MORNING_GREETING]
+    size = len(MORNING_GREETING)
+    for report in reports:
+        for piece in _split_to_limit(report, limit):
+            if size + 2 + len(piece) > limit:
+                messages.append("\n\n".join(parts))
+                parts, size = [], -2
+            parts.append(piece)
+            size += 2 + len(piece)
+    messages.append("\n\n".join(parts))
+    return messages
+
+
+def _format_weather_section(settings: UserSettings, summary: "DailySummaryResult") -> tuple[str, ...]:
+    # 同じ地点・同じ予報のユーザーは同じブロックになるので、入力の内容をキーに組み立て結果を共有する。
+    weather = summary.weather or {}
+    location_label = settings.location_name or _fallback_latlon(settings)
+    values = tuple(weather.get(field) for field in _WEATHER_FIELDS)
+    try:
+        return _render_weather_section(summary.weather_status, location_label, values)
+    except TypeError:
+        # ハッシュできない値が混ざった場合はキャッシュを通さない。
+        return _render_weather_section.__wrapped__(summary.weather_status, location_label, values)
+
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def _render_weather_section(status: str, location_label: str, values: tuple) -> tuple[str, ...]:
+    if status == "missing":
+        return (
             "📍 今日の天気",
             "未設定です。`/setlocation <地名 or 緯度経度>` で登録してください。",
-        ]
+        )
 
-    if summary.weather_status == "error":
-        return [
+    if status == "error":
+        return (
             "📍 今日の天気",
             "❌ 天気の取得に失敗しました。",
-        ]
+        )
 
-    weather = summary.weather or {}
-    location_label = settings.location_name or _fallback_latlon(settings)
-    current_temp = _format_number(weather.get("current_temperature"), suffix="℃")
-    max_temp = _format_number(weather.get("temperature_max"), suffix="℃")
-    min_temp = _format_number(weather.get("temperature_min"), suffix="℃")
-    pop = _format_number(weather.get("precipitation_probability_max"), suffix="%")
-    weather_text = weather.get("weather_text") or "不明"
+    if status == "pending":
+        return (
+            "📍 今日の天気",
+            PENDING_LINE,
+        )
+
+    weather_text, current, max_temp, min_temp, pop = values
+    current_temp = _format_number(current, suffix="℃")
+    max_temp = _format_number(max_temp, suffix="℃")
+    min_temp = _format_number(min_temp, suffix="℃")
+    pop = _format_number(pop, suffix="%")
+    weather_text = weather_text or "不明"
 
     detail_line = f"{weather_text} / {current_temp}（最高 {max_temp}・最低 {min_temp}）"
 
-    lines = [f"📍 今日の天気（{location_label}）", detail_line]
+    lines = (f"📍 今日の天気（{location_label}）", detail_line)
     if pop != "-":
-        lines.append(f"降水確率: {pop}")
+        lines += (f"降水確率: {pop}",)
     return lines
 
 
-def _format_calendar_section(summary: "DailySummaryResult") -> list[str]:
-    if summary.calendar_status == "missing":
-        return [
+def _format_calendar_section(summary: "DailySummaryResult") -> tuple[str, ...]:
+    # 共有カレンダーの予定は多くのユーザーで同一なので、予定の内容をキーに組み立て結果を共有する。
+    events = tuple(
+        (bool(event.get("all_day")), event.get("start"), event.get("end"), event.get("summary"))
+        for event in summary.events
+    )
+    try:
+        return _render_calendar_section(summary.calendar_status, events)
+    except TypeError:
+        return _render_calendar_section.__wrapped__(summary.calendar_status, events)
+
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def _render_calendar_section(status: str, events: tuple) -> tuple[str, ...]:
+    if status == "missing":
+        return (
             "📅 今日の予定",
             "未設定です。`/setcalendar <calendar_id>` で登録してください。",
-        ]
+        )
 
-    if summary.calendar_status == "error":
-        return [
+    if status == "error":
+        return (
             "📅 今日の予定",
             "❌ 予定の取得に失敗しました。",
-        ]
+        )
+
+    if status == "pending":
+        return (
+            "📅 今日の予定",
+            PENDING_LINE,
+        )
 
     lines = ["📅 今日の予定"]
-    if not summary.events:
+    if not events:
         lines.append("予定なし")
-        return lines
+        return tuple(lines)
 
-    for event in summary.events:
-        lines.append(_format_event_line(event))
-    return lines
+    for event in events:
+        lines.append(_format_event_line(*event))
+    return tuple(lines)
+
+
+def section_cache_stats() -> dict[str, int]:
+    stats: dict[str, int] = {}
+    for name, render in (("weather", _render_weather_section), ("calendar", _render_calendar_section)):
+        info = render.cache_info()
+        stats[f"{name}_hits"] = info.hits
+        stats[f"{name}_misses"] = info.misses
+        stats[f"{name}_size"] = info.currsize
+    return stats
 
 
-def _format_event_line(event: dict) -> str:
-    summary = event.get("summary") or "(無題)"
-    if event.get("all_day"):
+def _format_event_line(all_day: bool, start: str | None, end: str | None, summary: str | None) -> str:
+    summary = summary or "(無題)"
+    if all_day:
         return f"終日 {summary}"
 
-    start = event.get("start")
-    end = event.get("end")
     if start and end:
         return f"{start}-{end} {summary}"
     if start:
@@ -131,6 +209,28 @@ def _format_event_line(event: dict) -> str:
     return summary
 
 
+def _split_to_limit(text: str, limit: int) -> list[str]:
+    if len(text) <= limit:
+        return [text]
+    pieces: list[str] = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + 1 + len(line) > limit:
+            pieces.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
 def _format_calendar_ids(settings: UserSettings) -> str:
     calendar_ids = settings.calendar_ids
     if not calendar_ids:
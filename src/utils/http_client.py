@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+from typing import Any
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_CAP = 10.0
+
+
+def _jittered(backoff: float) -> float:
+    # 同時刻に失敗した多数のリクエストが揃って再送しないよう、待ち時間の後半をランダムにずらす。
+    backoff = min(backoff, BACKOFF_CAP)
+    if backoff <= 0:
+        return 0.0
+    return backoff / 2 + random.uniform(0.0, backoff / 2)
+
+
+class _JitteredRetry(Retry):
+    def get_backoff_time(self) -> float:
+        return _jittered(super().get_backoff_time())
+
+
+class HttpSessionPool:
+    # Session はスレッドごとに持ち、接続プール（HTTPAdapter）だけを全スレッドで共有する。
+
+    def __init__(
+        self,
+        *,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff_factor: float = 0.5,
+    ):
+        retry = _JitteredRetry(
+            total=max(0, max_retries),
+            connect=max(0, max_retries),
+            read=max(0, max_retries),
+            status=max(0, max_retries),
+            backoff_factor=max(0.0, backoff_factor),
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=max(1, pool_size),
+            pool_maxsize=max(1, pool_size),
+            max_retries=retry,
+        )
+        self._local = threading.local()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session().get(url, **kwargs)
+
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def close(self) -> None:
+        self._adapter.close()
+
+
+class AsyncHttpClient:
+    # イベントループ用の HttpSessionPool。セッションは実行中のループ内で遅延生成し、再試行方針も揃える。
+
+    def __init__(
+        self,
+        *,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff_factor: float = 0.5,
+    ):
+        self.pool_size = max(1, pool_size)
+        self.max_retries = max(0, max_retries)
+        self.backoff_factor = max(0.0, backoff_factor)
+        self._session: aiohttp.ClientSession | None = None
+
+    async def get_json(self, url: str, *, params: dict[str, Any], timeout_sec: float) -> Any:
+        timeout = aiohttp.ClientTimeout(total=timeout_sec)
+        attempt = 0
+        while True:
+            try:
+                async with self._get_session().get(url, params=params, timeout=timeout) as response:
+                    if response.status not in RETRY_STATUSES or attempt >= self.max_retries:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                    delay = _retry_after(response) or _jittered(self.backoff_factor * (2**attempt))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                delay = _jittered(self.backoff_factor * (2**attempt))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300),
+                headers={"Accept-Encoding": "gzip, deflate"},
+            )
+        return self._session
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> float | None:
+    raw = response.headers.get("Retry-After")
+    if not raw:
+        return None
+    try:
+        return min(max(0.0, float(raw)), BACKOFF_CAP)
+    except ValueError:
+        return None
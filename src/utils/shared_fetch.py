@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SharedFetchCache(Generic[K, V]):
+    # 短い TTL のキャッシュ。同じキーの同時取得は先頭の1回に合流し、成功した値だけを保持する。
+    # stale_sec の間は期限切れの値を返しつつ裏で1本だけ更新する。
+
+    def __init__(
+        self,
+        *,
+        ttl_sec: float,
+        max_entries: int = 4096,
+        stale_sec: float = 0.0,
+        ttl_for: Callable[[K, V], float] | None = None,
+        refresh_workers: int = 2,
+    ):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max(1, max_entries)
+        self.stale_sec = max(0.0, stale_sec)
+        self.ttl_for = ttl_for
+        self.refresh_workers = max(1, refresh_workers)
+        self._entries: dict[K, tuple[float, V]] = {}
+        self._inflight: dict[K, Future[V]] = {}
+        self._lock = threading.Lock()
+        self._refresher: ThreadPoolExecutor | None = None
+        self._refresh_tasks: set[asyncio.Task[None]] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get_or_load(self, key: K, loader: Callable[[], V]) -> V:
+        outcome = self.get_or_load_many([key], lambda missing: {missing[0]: loader()})[key]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def get_or_load_many(
+        self,
+        keys: list[K],
+        loader: Callable[[list[K]], dict[K, V | Exception]],
+    ) -> dict[K, V | Exception]:
+        results, waits, leading, refreshing = self._claim(keys)
+
+        if refreshing:
+            self._refresh_executor().submit(self._load_and_settle, refreshing, loader, {})
+
+        if leading:
+            self._load_and_settle(leading, loader, results)
+
+        for key, future in waits.items():
+            try:
+                results[key] = future.result()
+            except Exception as exc:
+                results[key] = exc
+        return results
+
+    async def get_or_load_many_async(
+        self,
+        keys: list[K],
+        loader: Callable[[list[K]], Awaitable[dict[K, V | Exception]]],
+    ) -> dict[K, V | Exception]:
+        # スレッド側の呼び出しと同じエントリ・同じ in-flight を共有する。
+        results, waits, leading, refreshing = self._claim(keys)
+
+        if refreshing:
+            task = asyncio.create_task(self._load_and_settle_async(refreshing, loader, {}))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+
+        if leading:
+            await self._load_and_settle_async(leading, loader, results)
+
+        for key, future in waits.items():
+            try:
+                # 待ち手のタイムアウト・取り消しで共有の Future まで取り消さないよう shield する。
+                results[key] = await asyncio.shield(asyncio.wrap_future(future))
+            except Exception as exc:
+                results[key] = exc
+        return results
+
+    def _claim(
+        self,
+        keys: list[K],
+    ) -> tuple[dict[K, V | Exception], dict[K, Future[V]], dict[K, Future[V]], dict[K, Future[V]]]:
+        results: dict[K, V | Exception] = {}
+        waits: dict[K, Future[V]] = {}
+        leading: dict[K, Future[V]] = {}
+        refreshing: dict[K, Future[V]] = {}
+
+        now = time.monotonic()
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self.hits += 1
+                    results[key] = entry[1]
+                    continue
+                future = self._inflight.get(key)
+                if entry is not None and entry[0] + self.stale_sec > now:
+                    # 期限切れでも猶予内なら古い値を返し、更新は裏で1本だけ走らせる。
+                    self.stale_hits += 1
+                    results[key] = entry[1]
+                    if future is None:
+                        future = Future()
+                        self._inflight[key] = future
+                        refreshing[key] = future
+                    continue
+                if future is not None:
+                    self.coalesced += 1
+                    waits[key] = future
+                    continue
+                future = Future()
+                self._inflight[key] = future
+                leading[key] = future
+                self.misses += 1
+        return results, waits, leading, refreshing
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.coalesced + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "errors": self.errors,
+                # 上流へ出なかった割合（合流した待ち手も含む）。
+                "hit_ratio": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        if self._refresher is not None:
+            self._refresher.shutdown(wait=False, cancel_futures=True)
+            self._refresher = None
+
+    def _refresh_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers,
+                    thread_name_prefix="shared-fetch-refresh",
+                )
+            return self._refresher
+
+    def _load_and_settle(
+        self,
+        leading: dict[K, Future[V]],
+        loader: Callable[[list[K]], dict[K, V | Exception]],
+        results: dict[K, V | Exception],
+    ) -> None:
+        try:
+            loaded = loader(list(leading))
+        except Exception as exc:
+            loaded = {key: exc for key in leading}
+        self._settle(leading, loaded, results)
+
+    async def _load_and_settle_async(
+        self,
+        leading: dict[K, Future[V]],
+        loader: Callable[[list[K]], Awaitable[dict[K, V | Exception]]],
+        results: dict[K, V | Exception],
+    ) -> None:
+        try:
+            loaded = await loader(list(leading))
+        except Exception as exc:
+            loaded = {key: exc for key in leading}
+        except asyncio.CancelledError:
+            # 取り消されても待ち手を置き去りにしない。
+            self._settle(leading, {key: asyncio.TimeoutError() for key in leading}, results)
+            raise
+        self._settle(leading, loaded, results)
+
+    def _settle(
+        self,
+        leading: dict[K, Future[V]],
+        loaded: dict[K, V | Exception],
+        results: dict[K, V | Exception],
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key, future in leading.items():
+                self._inflight.pop(key, None)
+                value = loaded.get(key)
+                if value is None:
+                    value = KeyError(key)
+                if isinstance(value, Exception):
+                    self.errors += 1
+                else:
+                    ttl_sec = self.ttl_for(key, value) if self.ttl_for is not None else self.ttl_sec
+                    self._entries[key] = (now + ttl_sec, value)
+                results[key] = value
+            if len(self._entries) > self.max_entries:
+                self._evict_expired()
+
+        for key, future in leading.items():
+            if future.cancelled():
+                continue
+            value = results[key]
+            if isinstance(value, Exception):
+                future.set_exception(value)
+            else:
+                future.set_result(value)
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for key in [
+            key for key, (expires_at, _) in self._entries.items() if expires_at + self.stale_sec <= now
+        ]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
@@ -3,6 +3,9 @@ from __future__ import annotations
 from datetime import datetime, time, timedelta, timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+# 発火時刻からこの時間内であれば当日分として送信する（起動直後・設定変更直後を含む）。
+FIRE_WINDOW = timedelta(seconds=60)
+
 
 def get_zoneinfo(tz_name: str) -> ZoneInfo:
     try:
@@ -42,3 +45,30 @@ def parse_iso_datetime_to_local(value: str, tz_name: str) -> datetime:
 
 def format_hhmm(dt: datetime) -> str:
     return dt.strftime("%H:%M")
+
+
+def next_fire_utc(morning_time: str, tz_name: str, *, after: datetime) -> datetime:
+    # ローカルの HH:MM を UTC の発火時刻へ変換する。DST の欠落/重複時刻は zoneinfo の fold=0 に従う。
+    tz = get_zoneinfo(tz_name)
+    hour_str, minute_str = morning_time.strip().split(":", 1)
+    fire_time = time(int(hour_str), int(minute_str))
+    after_utc = after.astimezone(timezone.utc)
+    local_date = after_utc.astimezone(tz).date()
+    for day_offset in range(3):
+        candidate = datetime.combine(local_date + timedelta(days=day_offset), fire_time, tzinfo=tz)
+        candidate_utc = candidate.astimezone(timezone.utc)
+        if candidate_utc > after_utc:
+            return candidate_utc
+    return datetime.combine(local_date + timedelta(days=3), fire_time, tzinfo=tz).astimezone(timezone.utc)
+
+
+def format_utc(dt: datetime) -> str:
+    # 文字列比較で時系列順になるよう、秒精度・UTC固定で保存する。
+    return dt.astimezone(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def parse_utc(value: str) -> datetime:
+    dt = datetime.fromisoformat(normalize_iso_datetime(value))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import heapq
+from datetime import datetime
+
+
+class TimerQueue:
+    # 発火時刻ごとにキーをまとめた min-heap。同じ時刻のユーザーは1回の起床でまとめて取り出す。
+
+    def __init__(self) -> None:
+        self._heap: list[datetime] = []
+        self._buckets: dict[datetime, set[str]] = {}
+        self._fire_at: dict[str, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._fire_at)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fire_at
+
+    def fire_at(self, key: str) -> datetime | None:
+        return self._fire_at.get(key)
+
+    def schedule(self, key: str, fire_at: datetime) -> None:
+        current = self._fire_at.get(key)
+        if current == fire_at:
+            return
+        if current is not None:
+            self._discard(key, current)
+        bucket = self._buckets.get(fire_at)
+        if bucket is None:
+            bucket = set()
+            self._buckets[fire_at] = bucket
+            heapq.heappush(self._heap, fire_at)
+        bucket.add(key)
+        self._fire_at[key] = fire_at
+
+    def cancel(self, key: str) -> None:
+        current = self._fire_at.pop(key, None)
+        if current is not None:
+            self._discard(key, current)
+
+    def next_fire_at(self) -> datetime | None:
+        while self._heap and not self._buckets.get(self._heap[0]):
+            self._buckets.pop(heapq.heappop(self._heap), None)
+        return self._heap[0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list[tuple[datetime, list[str]]]:
+        due: list[tuple[datetime, list[str]]] = []
+        while self._heap and self._heap[0] <= now:
+            fire_at = heapq.heappop(self._heap)
+            bucket = self._buckets.pop(fire_at, None)
+            if not bucket:
+                continue
+            keys = sorted(bucket)
+            for key in keys:
+                self._fire_at.pop(key, None)
+            due.append((fire_at, keys))
+        return due
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._buckets.clear()
+        self._fire_at.clear()
+
+    def _discard(self, key: str, fire_at: datetime) -> None:
+        bucket = self._buckets.get(fire_at)
+        if bucket is not None:
+            bucket.discard(key)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    # 毎秒 rate 個・最大 capacity 個のトークンバケット。待ち手は到着順で、block_for は Retry-After の間だけ全員を止める。
+
+    def __init__(self, *, rate: float, capacity: float):
+        self.rate = max(0.0, rate)
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                wait = self._take()
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+
+    def block_for(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        self._refill()
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        # 解除されるまではトークンも貯めない。
+        self._updated = self._blocked_until
+
+    def idle(self) -> bool:
+        # 満タンで待ち手もいなければ捨てて作り直しても挙動は変わらない。
+        self._refill()
+        return self._tokens >= self.capacity and not self._lock.locked() and self._blocked_until <= time.monotonic()
+
+    def _take(self) -> float:
+        now = time.monotonic()
+        if self._blocked_until > now:
+            return self._blocked_until - now
+        if not self.rate:
+            return 0.0
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if now <= self._updated:
+            return
+        if self.rate:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
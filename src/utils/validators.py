@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+import unicodedata
 
 _COORD_RE = re.compile(r"^\s*([+-]?\d+(?:\.\d+)?)\s*,\s*([+-]?\d+(?:\.\d+)?)\s*$")
 _COORDISH_RE = re.compile(r"^[\s+\-\d.,]+$")
@@ -69,5 +70,11 @@ def parse_lat_lon(value: str) -> tuple[float, float] | None:
     return lat, lon
 
 
+def normalize_place_query(value: str) -> str:
+    # 全角/半角・大文字小文字・空白の揺れを吸収してキャッシュキーにする。
+    text = unicodedata.normalize("NFKC", value)
+    return " ".join(text.split()).casefold()
+
+
 def is_valid_hhmm(value: str) -> bool:
     return bool(_HHMM_RE.fullmatch(value.strip()))